@@ -7,49 +7,92 @@ def backward_chaining(kb, query):
     query: proposition symbol to be proved
     """
     entailed = []    # Track the order of inference
+    entailed_set = set()  # Fast membership checks for entailed
     
-    def bc_recursive(goal, visited):
+    # Local names avoid repeated attribute lookups in the search loop
+    facts = kb.facts
+    
+    # Index rules by conclusion so each goal only looks at relevant rules
+    rules_by_conclusion = {}
+    for rule in kb.rules:
+        rules_by_conclusion.setdefault(rule.conclusion, []).append(rule)
+    
+    # Memoize subgoal outcomes so shared premises are only explored once
+    proved = set()
+    failed = set()
+    cycle_cuts = 0  # Number of times a path was cut by the visited check
+    
+    # The proof search runs on an explicit stack instead of Python recursion.
+    # Each frame is [goal, rule_iterator, premise_iterator, cuts_before]; the goals
+    # of the frames on the stack are exactly the goals on the current proof path
+    GOAL, RULES, PREMISES, CUTS = range(4)
+    stack = []
+    on_path = set()
+    
+    def mark_entailed(goal):
+        if goal not in entailed_set:
+            entailed_set.add(goal)
+            entailed.append(goal)
+        proved.add(goal)
+    
+    def enter(goal):
         """
-        Recursive helper function for backward chaining.
-        Returns True if goal can be proven, False otherwise.
+        Start proving goal. Returns True/False when the answer is known
+        immediately, or None after pushing a frame for the goal's rules.
         """
+        nonlocal cycle_cuts
+        if goal in proved:
+            return True
+        if goal in failed:
+            return False
+        
         # Avoid infinite loops in this path
-        if goal in visited:
+        if goal in on_path:
+            cycle_cuts += 1
             return False
         
         # Check if goal is already a known fact
-        if goal in kb.facts:
-            if goal not in entailed:
-                entailed.append(goal)
+        if goal in facts:
+            mark_entailed(goal)
             return True
         
-        # Try to prove goal using rules
-        for rule in kb.rules:
-            if rule.conclusion == goal:
-                # Create new visited set for this rule attempt
-                new_visited = visited | {goal}
-                
-                # Try to prove all premises of this rule
-                all_premises_proven = True
-                premises_for_this_rule = []
-                
-                for premise in rule.premises:
-                    if bc_recursive(premise, new_visited):
-                        if premise not in premises_for_this_rule:
-                            premises_for_this_rule.append(premise)
-                    else:
-                        all_premises_proven = False
-                        break
-                
-                if all_premises_proven:
-                    # Add the goal (conclusion) to entailed list if not already there
-                    if goal not in entailed:
-                        entailed.append(goal)
-                    return True
-        
-        return False
+        stack.append([goal, iter(rules_by_conclusion.get(goal, ())), None, cycle_cuts])
+        on_path.add(goal)
+        return None
     
-    # Start the backward chaining process
-    result = bc_recursive(query, set())
+    result = enter(query)
+    child_result = None  # Answer handed back by the frame that was just popped
+    
+    while stack:
+        frame = stack[-1]
+        
+        if child_result is False:
+            frame[PREMISES] = None  # A premise failed, so this rule fails
+        child_result = None
+        
+        if frame[PREMISES] is None:
+            # Try the next rule that concludes this goal
+            rule = next(frame[RULES], None)
+            if rule is None:
+                # Only cache failures that did not depend on the current path
+                if cycle_cuts == frame[CUTS]:
+                    failed.add(frame[GOAL])
+                on_path.discard(stack.pop()[GOAL])
+                child_result = result = False
+                continue
+            frame[PREMISES] = iter(rule.premises)
+        
+        # Try to prove the next premise of the current rule
+        premise = next(frame[PREMISES], None)
+        if premise is None:
+            # All premises proven - the goal (conclusion) is entailed
+            mark_entailed(frame[GOAL])
+            on_path.discard(stack.pop()[GOAL])
+            child_result = result = True
+            continue
+        
+        outcome = enter(premise)
+        if outcome is False:
+            frame[PREMISES] = None
     
     return result, entailed
\ No newline at end of file
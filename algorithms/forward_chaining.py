@@ -8,34 +8,57 @@ def forward_chaining(kb, query):
     kb: KnowledgeBase object
     query: proposition symbol to be proved
     """
-    inferred = set()
-    agenda = deque(kb.facts)
-    entailed = []
+    # Give every symbol a small integer id so the main loop works on flat lists
+    symbol_ids = {}
+    symbols = []
+
+    def symbol_id(symbol):
+        sid = symbol_ids.get(symbol)
+        if sid is None:
+            sid = symbol_ids[symbol] = len(symbols)
+            symbols.append(symbol)
+        return sid
 
-    # Convert rules into easy-to-use structures
-    count = {}  # how many premises are still unsatisfied for each rule
-    rule_map = {}
+    fact_ids = [symbol_id(fact) for fact in kb.facts]
 
-    for rule in kb.rules:
-        count[rule] = len(rule.premises)
+    count = []            # how many premises are still unsatisfied for each rule
+    rule_conclusion = []  # conclusion symbol id for each rule
+    premise_rules = {}    # symbol id -> ids of rules using it as a premise
+
+    for rule_id, rule in enumerate(kb.rules):
+        count.append(len(rule.premises))
+        rule_conclusion.append(symbol_id(rule.conclusion))
         for premise in rule.premises:
-            if premise not in rule_map:
-                rule_map[premise] = []
-            rule_map[premise].append(rule)
+            premise_rules.setdefault(symbol_id(premise), []).append(rule_id)
+
+    query_id = symbol_ids.get(query, -1)
+
+    inferred = bytearray(len(symbols))  # facts count as inferred so they are never queued twice
+    for sid in fact_ids:
+        inferred[sid] = 1
+    agenda = deque(fact_ids)
+    entailed = []
+
+    # Bind hot-loop methods to locals to skip attribute lookups
+    agenda_popleft = agenda.popleft
+    agenda_append = agenda.append
+    entailed_append = entailed.append
+    rules_for = premise_rules.get
 
     while agenda:
-        symbol = agenda.popleft()
-        entailed.append(symbol)
+        sid = agenda_popleft()
+        entailed_append(symbols[sid])
 
-        if symbol == query:
+        if sid == query_id:
             return True, entailed
 
-        if symbol in rule_map:
-            for rule in rule_map[symbol]:
-                count[rule] -= 1
-                if count[rule] == 0:
-                    if rule.conclusion not in inferred:
-                        inferred.add(rule.conclusion)
-                        agenda.append(rule.conclusion)
+        for rule_id in rules_for(sid, ()):
+            conclusion = rule_conclusion[rule_id]
+            if inferred[conclusion]:
+                continue  # nothing new to learn from this rule
+            count[rule_id] -= 1
+            if count[rule_id] == 0:
+                inferred[conclusion] = 1
+                agenda_append(conclusion)
 
     return False, entailed
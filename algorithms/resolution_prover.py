@@ -1,126 +1,219 @@
 # Additional required imports and classes for resolution
-from knowledge_base import Clause, Atom, Negation, Conjunction, Disjunction, Implication, Biconditional
+from heapq import heappush, heappop
+from collections import defaultdict
+from itertools import count, product
+from algorithms.forward_chaining import forward_chaining
+from knowledge_base import Clause, Atom, Negation, BinaryExpression, Conjunction, Disjunction, Implication, Biconditional
 
 def negate_literal(literal):
     """Negate a literal"""
-    if literal.startswith('~'):
+    if literal[0] == '~':
         return literal[1:]  # Remove negation
     else:
         return '~' + literal  # Add negation
 
-def convert_to_cnf(expr):
-    """Convert a logical expression to Conjunctive Normal Form (CNF) - FIXED"""
+def rewrite_post_order(root, children, build, key=id):
+    """
+    Iterative post-order rewrite of an expression tree.
+    children(item) -> list of child items, build(item, child_results) -> result.
+    Results are memoized by key(item), so shared subtrees are rewritten once.
+    """
+    rewritten = {}
+    stack = [(root, False)]
     
-    def eliminate_biconditionals(expr):
-        """Replace p <=> q with (p => q) & (q => p)"""
-        if isinstance(expr, Biconditional):
-            left_to_right = Implication(expr.left, expr.right)
-            right_to_left = Implication(expr.right, expr.left)
-            return Conjunction(left_to_right, right_to_left)
-        elif isinstance(expr, BinaryExpression):
-            return type(expr)(eliminate_biconditionals(expr.left), 
-                            eliminate_biconditionals(expr.right))
-        elif isinstance(expr, Negation):
-            return Negation(eliminate_biconditionals(expr.operand))
-        else:
-            return expr
-    
-    def eliminate_implications(expr):
-        """Replace p => q with ~p || q"""
-        if isinstance(expr, Implication):
-            return Disjunction(Negation(expr.left), expr.right)
-        elif isinstance(expr, BinaryExpression):
-            return type(expr)(eliminate_implications(expr.left), 
-                            eliminate_implications(expr.right))
-        elif isinstance(expr, Negation):
-            return Negation(eliminate_implications(expr.operand))
+    while stack:
+        item, expanded = stack.pop()
+        item_key = key(item)
+        if item_key in rewritten:
+            continue
+        
+        kids = children(item)
+        if expanded:
+            rewritten[item_key] = build(item, [rewritten[key(kid)] for kid in kids])
         else:
-            return expr
-    
-    def move_negations_inward(expr):
-        """Apply De Morgan's laws and double negation elimination - FIXED"""
-        if isinstance(expr, Negation):
-            if isinstance(expr.operand, Negation):
-                # Double negation elimination: ~~p becomes p
-                return move_negations_inward(expr.operand.operand)
-            elif isinstance(expr.operand, Conjunction):
-                # De Morgan's law: ~(p & q) becomes ~p || ~q
-                left = move_negations_inward(Negation(expr.operand.left))
-                right = move_negations_inward(Negation(expr.operand.right))
-                return Disjunction(left, right)
-            elif isinstance(expr.operand, Disjunction):
-                # De Morgan's law: ~(p || q) becomes ~p & ~q
-                left = move_negations_inward(Negation(expr.operand.left))
-                right = move_negations_inward(Negation(expr.operand.right))
-                return Conjunction(left, right)
-            else:
-                # Negation of atom - keep as is
-                return expr
-        elif isinstance(expr, BinaryExpression):
-            return type(expr)(move_negations_inward(expr.left), 
-                            move_negations_inward(expr.right))
+            # Revisit this item once all of its children have been rewritten
+            stack.append((item, True))
+            for kid in kids:
+                if key(kid) not in rewritten:
+                    stack.append((kid, False))
+    
+    return rewritten[key(root)]
+
+def expression_children(expr):
+    """Direct subexpressions of a logical expression"""
+    if isinstance(expr, BinaryExpression):
+        return [expr.left, expr.right]
+    elif isinstance(expr, Negation):
+        return [expr.operand]
+    return []
+
+def flatten(expr, kind):
+    """Flatten a tree of kind (Conjunction or Disjunction) nodes into its list of operands"""
+    result = []
+    stack = [expr]
+    while stack:
+        e = stack.pop()
+        if isinstance(e, kind):
+            stack.append(e.right)
+            stack.append(e.left)
         else:
-            return expr
+            result.append(e)
+    return result
+
+def nary_children(expr):
+    """Operands of an AND/OR chain taken as one n-ary node, else the direct subexpressions"""
+    if isinstance(expr, Conjunction):
+        return flatten(expr, Conjunction)
+    elif isinstance(expr, Disjunction):
+        return flatten(expr, Disjunction)
+    return expression_children(expr)
+
+def to_nnf(expr, negated=False):
+    """
+    Convert an expression to Negation Normal Form in a single pass.
+    Biconditional and implication elimination, De Morgan's laws and double
+    negation elimination are applied together while walking (node, negated) pairs.
+    Output nodes are hash-consed, so structurally equal subtrees are the same
+    object and later id()-memoized passes (distribution) handle each only once.
+    """
+    nodes = {}  # (type, symbol) for literals, (type, id(left), id(right)) otherwise
+    
+    def make(cls, *kids):
+        node_key = (cls,) + tuple(map(id, kids))
+        node = nodes.get(node_key)
+        if node is None:
+            node = nodes[node_key] = cls(*kids)
+        return node
+    
+    def literal(e, neg):
+        node_key = (Negation if neg else Atom, e.symbol)
+        node = nodes.get(node_key)
+        if node is None:
+            node = nodes[node_key] = Negation(e) if neg else e
+        return node
+    
+    def children(item):
+        e, neg = item
+        if isinstance(e, Negation):
+            # Double negation elimination: ~~p becomes p
+            return [(e.operand, not neg)]
+        elif isinstance(e, Biconditional):
+            if neg:
+                # ~(p <=> q) becomes (p || q) & (~p || ~q)
+                return [(e.left, False), (e.right, False), (e.left, True), (e.right, True)]
+            # p <=> q becomes (~p || q) & (~q || p)
+            return [(e.left, True), (e.right, False), (e.right, True), (e.left, False)]
+        elif isinstance(e, Implication):
+            # p => q becomes ~p || q, and ~(p => q) becomes p & ~q
+            return [(e.left, not neg), (e.right, neg)]
+        elif isinstance(e, (Conjunction, Disjunction)):
+            return [(e.left, neg), (e.right, neg)]
+        return []
+    
+    def build(item, kids):
+        e, neg = item
+        if isinstance(e, Negation):
+            return kids[0]
+        elif isinstance(e, Biconditional):
+            return make(Conjunction, make(Disjunction, kids[0], kids[1]), make(Disjunction, kids[2], kids[3]))
+        elif isinstance(e, Implication):
+            return make(Conjunction, *kids) if neg else make(Disjunction, *kids)
+        elif isinstance(e, Conjunction):
+            # De Morgan's law: ~(p & q) becomes ~p || ~q
+            return make(Disjunction, *kids) if neg else make(Conjunction, *kids)
+        elif isinstance(e, Disjunction):
+            # De Morgan's law: ~(p || q) becomes ~p & ~q
+            return make(Conjunction, *kids) if neg else make(Disjunction, *kids)
+        # Negation of atom - keep as is
+        return literal(e, neg)
+    
+    return rewrite_post_order((expr, negated), children, build,
+                              key=lambda item: (id(item[0]), item[1]))
+
+def convert_to_cnf(expr):
+    """Convert a logical expression to Conjunctive Normal Form (CNF) - FIXED"""
     
     def distribute_or_over_and(expr):
         """Distribute OR over AND to get CNF: (A || (B & C)) becomes (A || B) & (A || C)"""
-        if isinstance(expr, Disjunction):
-            left = distribute_or_over_and(expr.left)
-            right = distribute_or_over_and(expr.right)
-            
-            # Check if we need to distribute
-            if isinstance(left, Conjunction):
-                # (A & B) || C becomes (A || C) & (B || C)
-                a_or_right = distribute_or_over_and(Disjunction(left.left, right))
-                b_or_right = distribute_or_over_and(Disjunction(left.right, right))
-                return Conjunction(a_or_right, b_or_right)
-            elif isinstance(right, Conjunction):
-                # A || (B & C) becomes (A || B) & (A || C)
-                left_or_b = distribute_or_over_and(Disjunction(left, right.left))
-                left_or_c = distribute_or_over_and(Disjunction(left, right.right))
-                return Conjunction(left_or_b, left_or_c)
-            else:
-                return Disjunction(left, right)
-        elif isinstance(expr, Conjunction):
-            return Conjunction(distribute_or_over_and(expr.left), 
-                             distribute_or_over_and(expr.right))
-        elif isinstance(expr, Negation):
-            return Negation(distribute_or_over_and(expr.operand))
-        else:
-            return expr
+        def chain(cls, items):
+            result = items[0]
+            for item in items[1:]:
+                result = cls(result, item)
+            return result
+        
+        def build(e, kids):
+            if isinstance(e, Disjunction):
+                # Every disjunct is already CNF, so OR together one clause from each, in every combination
+                clauses = [chain(Disjunction, combo)
+                           for combo in product(*[flatten(kid, Conjunction) for kid in kids])]
+                return chain(Conjunction, clauses)
+            elif isinstance(e, Conjunction):
+                return chain(Conjunction, kids)
+            elif isinstance(e, Negation):
+                return Negation(kids[0])
+            return e
+        return rewrite_post_order(expr, nary_children, build)
     
-    # Apply transformations step by step
-    expr = eliminate_biconditionals(expr)
-    expr = eliminate_implications(expr)
-    expr = move_negations_inward(expr)
+    # Push negations to the atoms, then distribute
+    expr = to_nnf(expr)
     expr = distribute_or_over_and(expr)
     
     return expr
 
+# A disjunction whose distributed CNF would exceed this many clauses has its
+# larger side replaced by a fresh definitional (Tseitin) atom instead
+CNF_CLAUSE_LIMIT = 64
+
+def definitional_cnf(nnf_expr, fresh, limit=CNF_CLAUSE_LIMIT):
+    """
+    Clauses (lists of literals) for an NNF expression. OR is distributed over AND
+    as usual, except where the product would exceed limit clauses: that side is
+    named by a fresh atom _tN with definitions ~_tN || c for each of its clauses.
+    The result is equisatisfiable with the input (not equivalent), which is all
+    refutation needs; subformulas only occur positively in NNF, so the one
+    direction of each definition suffices.
+    """
+    definitions = []
+    
+    def name(side):
+        atom = f"_t{next(fresh)}"
+        definitions.extend(['~' + atom] + clause for clause in side)
+        return [[atom]]
+    
+    def build(e, kids):
+        if isinstance(e, Conjunction):
+            return [clause for kid in kids for clause in kid]
+        elif isinstance(e, Disjunction):
+            clauses = [[]]
+            for side in kids:
+                while len(clauses) * len(side) > limit:
+                    if len(clauses) >= len(side):
+                        clauses = name(clauses)
+                    else:
+                        side = name(side)
+                clauses = [c + d for c in clauses for d in side]
+            return clauses
+        elif isinstance(e, Negation):
+            return [['~' + e.operand.symbol]]
+        return [[e.symbol]]
+    
+    clauses = rewrite_post_order(nnf_expr, nary_children, build)
+    return clauses + definitions
+
+def sentence_to_clauses(expr, fresh):
+    """Resolution clauses for one sentence, introducing definitional atoms only where CNF would blow up"""
+    return [Clause(literals) for literals in definitional_cnf(to_nnf(expr), fresh)]
+
 def extract_clauses_from_cnf(cnf_expr):
     """Extract clauses from CNF expression - IMPROVED"""
     clauses = []
     
-    def extract_from_conjunction(expr):
-        """Recursively extract clauses from conjunction"""
-        if isinstance(expr, Conjunction):
-            extract_from_conjunction(expr.left)
-            extract_from_conjunction(expr.right)
-        else:
-            # This should be a disjunction or a single literal
-            literals = extract_literals_from_disjunction(expr)
-            if literals is not None:  # Only add valid clauses
-                clauses.append(Clause(literals))
-    
     def extract_literals_from_disjunction(expr):
         """Extract literals from a disjunction or single literal"""
         literals = []
         
-        def collect_literals(e):
-            if isinstance(e, Disjunction):
-                collect_literals(e.left)
-                collect_literals(e.right)
-            elif isinstance(e, Negation) and isinstance(e.operand, Atom):
+        for e in flatten(expr, Disjunction):
+            if isinstance(e, Negation) and isinstance(e.operand, Atom):
                 literals.append('~' + e.operand.symbol)
             elif isinstance(e, Atom):
                 literals.append(e.symbol)
@@ -129,45 +222,95 @@ def extract_clauses_from_cnf(cnf_expr):
                 print(f"Warning: Unexpected expression in CNF: {e} (type: {type(e)})")
                 return None
         
-        result = collect_literals(expr)
-        if result is None:
-            return None
         return literals
     
-    # Handle the case where the entire expression is a single clause
-    if isinstance(cnf_expr, (Atom, Negation)) or isinstance(cnf_expr, Disjunction):
-        literals = extract_literals_from_disjunction(cnf_expr)
-        if literals is not None:
+    # Each conjunct should be a disjunction or a single literal
+    # (a whole expression that is not a conjunction is a single clause)
+    for expr in flatten(cnf_expr, Conjunction):
+        literals = extract_literals_from_disjunction(expr)
+        if literals is not None:  # Only add valid clauses
             clauses.append(Clause(literals))
-    else:
-        extract_from_conjunction(cnf_expr)
     
     return clauses
 
-def resolve(clause1, clause2):
-    """Attempt to resolve two clauses"""
-    resolvents = []
-    
-    # Find complementary literals
-    for lit1 in clause1.literals:
-        neg_lit1 = negate_literal(lit1)
-        if neg_lit1 in clause2.literals:
-            # We can resolve on this literal
-            new_literals = (clause1.literals - {lit1}) | (clause2.literals - {neg_lit1})
-            resolvent = Clause(new_literals)
-            resolvents.append(resolvent)
-    
-    return resolvents
+def iter_bits(mask):
+    """Yield each set bit of mask as a single-bit int"""
+    while mask:
+        bit = mask & -mask
+        yield bit
+        mask ^= bit
+
+def encode_clauses(clauses):
+    """
+    Encode clauses as (pos_mask, neg_mask) int pairs over an atom-id universe.
+    Returns: (encoded_clauses, atoms) where bit i of a mask stands for atoms[i]
+    """
+    atom_bits = {}
+    atoms = []
+    encoded = []
+    
+    for clause in clauses:
+        pos_mask = neg_mask = 0
+        for lit in clause.literals:
+            negative = lit[0] == '~'
+            atom = lit[1:] if negative else lit
+            bit = atom_bits.get(atom)
+            if bit is None:
+                bit = atom_bits[atom] = 1 << len(atoms)
+                atoms.append(atom)
+            if negative:
+                neg_mask |= bit
+            else:
+                pos_mask |= bit
+        encoded.append((pos_mask, neg_mask))
+    
+    return encoded, atoms
+
+def decode_clause(mask_clause, atoms):
+    """Turn a (pos_mask, neg_mask) pair back into a Clause for display"""
+    pos_mask, neg_mask = mask_clause
+    literals = [atoms[bit.bit_length() - 1] for bit in iter_bits(pos_mask)]
+    literals += ['~' + atoms[bit.bit_length() - 1] for bit in iter_bits(neg_mask)]
+    return Clause(literals)
+
+def clause_length(mask_clause):
+    """Number of literals in a (pos_mask, neg_mask) clause"""
+    return (mask_clause[0] | mask_clause[1]).bit_count()
 
-def convert_general_kb_to_clauses(kb):
-    """Convert general knowledge base to resolution clauses"""
+def resolve_masks(clause1, clause2):
+    """Resolve two non-tautological (pos_mask, neg_mask) clauses, skipping tautologies"""
+    pos1, neg1 = clause1
+    pos2, neg2 = clause2
+    pos = pos1 | pos2
+    neg = neg1 | neg2
+    
+    # Atoms that are positive in one clause and negative in the other
+    for bit in iter_bits((pos1 & neg2) | (neg1 & pos2)):
+        new_pos = pos & ~bit
+        new_neg = neg & ~bit
+        if not new_pos & new_neg:
+            yield (new_pos, new_neg)
+
+def convert_general_kb_to_clauses(kb, fresh=None):
+    """
+    Convert general knowledge base to resolution clauses
+    Each sentence's clauses are cached on the KB, so repeated queries skip CNF conversion.
+    fresh: counter for definitional atom names, shared with the query's clauses
+    """
     clauses = set()
+    if fresh is None:
+        fresh = kb.fresh_atoms
+    cache = kb.clause_cache
     
     for sentence in kb.sentences:
+        cached = cache.get(id(sentence))
+        if cached is not None and cached[0] is sentence:
+            clauses.update(cached[1])
+            continue
         # Convert each sentence to CNF and extract clauses
         try:
-            cnf = convert_to_cnf(sentence)
-            sentence_clauses = extract_clauses_from_cnf(cnf)
+            sentence_clauses = frozenset(sentence_to_clauses(sentence, fresh))
+            cache[id(sentence)] = (sentence, sentence_clauses)
             clauses.update(sentence_clauses)
         except Exception as e:
             print(f"Error converting sentence to CNF: {sentence}, Error: {e}")
@@ -176,15 +319,34 @@ def convert_general_kb_to_clauses(kb):
     
     return clauses
 
-def resolution_theorem_proving(kb, query):
+# The given-clause loop gives up once it holds more clauses than this, counting
+# the long resolvents set aside under max_len as well
+RESOLUTION_CLAUSE_LIMIT = 10000
+
+def resolution_theorem_proving(kb, query, trace=False):
     """
     Resolution-based theorem proving - FIXED VERSION
-    Returns: (result, derivation_steps)
+    trace: record derivation steps (off by default, formatting them is costly)
+    Returns: (result, derivation_steps), where result is None if the search was
+    abandoned at RESOLUTION_CLAUSE_LIMIT without deciding entailment
     """
+    # Definite Horn clauses with an atomic query: forward chaining decides
+    # entailment in linear time, so there is no need to saturate the clause set
+    if not hasattr(kb, 'sentences') and isinstance(query, str):
+        result, entailed = forward_chaining(kb, query)
+        derivation_steps = []
+        if trace:
+            derivation_steps.append("Horn KB with atomic query - answered by forward chaining")
+            derivation_steps.append(f"Inferred: {', '.join(entailed)}")
+        return result, derivation_steps
+    
     # Convert KB to clauses based on type
     if hasattr(kb, 'sentences'):  # GeneralKnowledgeBase
-        clauses = convert_general_kb_to_clauses(kb)
+        # Shared with the KB so a query never reuses a name from its cached clauses
+        fresh = kb.fresh_atoms
+        clauses = convert_general_kb_to_clauses(kb, fresh)
     else:  # Horn clause KnowledgeBase
+        fresh = count(1)
         clauses = convert_horn_kb_to_clauses(kb)
     
     # CRITICAL FIX: Handle query properly - convert to CNF and negate
@@ -197,10 +359,8 @@ def resolution_theorem_proving(kb, query):
         try:
             # First negate the query
             negated_query_expr = Negation(query)
-            # Convert to CNF
-            cnf_negated_query = convert_to_cnf(negated_query_expr)
-            # Extract clauses
-            negated_query_clauses = extract_clauses_from_cnf(cnf_negated_query)
+            # Convert to CNF and extract clauses
+            negated_query_clauses = sentence_to_clauses(negated_query_expr, fresh)
             # Add all clauses from the negated query
             for clause in negated_query_clauses:
                 clauses.add(clause)
@@ -210,49 +370,203 @@ def resolution_theorem_proving(kb, query):
     
     derivation_steps = []
     iteration = 0
-    max_iterations = 1000
     
     # Debug: print initial clauses
-    derivation_steps.append(f"Initial clauses: {[str(c) for c in clauses]}")
+    if trace:
+        derivation_steps.append(f"Initial clauses: {[str(c) for c in clauses]}")
+    
+    # Work on (pos_mask, neg_mask) bitmasks; atoms maps bits back to symbols
+    encoded, atoms = encode_clauses(clauses)
+    
+    # Given-clause loop: every pair of clauses is resolved exactly once
+    processed = set()
+    unprocessed = set()
+    queue = []      # heap of (length, age, clause): shortest, then oldest, clause is processed first
+    age = count()
+    deferred = set()  # resolvents longer than max_len, revisited only if the search stalls
+    alive = set()  # processed | unprocessed | {given}
+    pos_processed = defaultdict(set)  # atom bit -> processed clauses with it positive
+    neg_processed = defaultdict(set)  # atom bit -> processed clauses with it negative
+    pos_occurs = defaultdict(set)     # atom bit -> alive clauses with it positive
+    neg_occurs = defaultdict(set)     # atom bit -> alive clauses with it negative
+    # Each alive clause filed once, under its lowest positive bit, or lowest negative
+    # bit if it has no positive literals, so forward subsumption visits it at most once
+    pos_first = defaultdict(set)
+    neg_first = defaultdict(set)
     
-    while iteration < max_iterations:
+    def first_bucket(clause):
+        pos, neg = clause
+        if pos:
+            return pos_first[pos & -pos]
+        return neg_first[neg & -neg]
+    
+    def is_subsumed(clause):
+        """Forward subsumption: some alive clause is a subset of clause"""
+        pos, neg = clause
+        for first, mask in ((pos_first, pos), (neg_first, neg)):
+            for bit in iter_bits(mask):
+                for other_pos, other_neg in first.get(bit, ()):
+                    if other_pos & pos == other_pos and other_neg & neg == other_neg:
+                        return True
+        return False
+    
+    def remove_subsumed_by(clause):
+        """Backward subsumption: drop alive clauses that are proper supersets of clause"""
+        pos, neg = clause
+        # A superset holds every literal of clause, so scanning the rarest one suffices
+        bucket = min([pos_occurs[bit] for bit in iter_bits(pos)] +
+                     [neg_occurs[bit] for bit in iter_bits(neg)], key=len)
+        supersets = [other for other in bucket
+                     if other != clause and other[0] & pos == pos and other[1] & neg == neg]
+        for other in supersets:
+            remove_clause(other)
+    
+    def remove_clause(clause):
+        """Delete an alive clause from every index"""
+        alive.discard(clause)
+        first_bucket(clause).discard(clause)
+        processed.discard(clause)
+        unprocessed.discard(clause)
+        for bit in iter_bits(clause[0]):
+            pos_occurs[bit].discard(clause)
+            pos_processed[bit].discard(clause)
+        for bit in iter_bits(clause[1]):
+            neg_occurs[bit].discard(clause)
+            neg_processed[bit].discard(clause)
+    
+    def add_clause(clause):
+        """Queue a clause unless it is subsumed by one we already have"""
+        if is_subsumed(clause):
+            return
+        remove_subsumed_by(clause)
+        alive.add(clause)
+        first_bucket(clause).add(clause)
+        unprocessed.add(clause)
+        heappush(queue, (clause_length(clause), next(age), clause))
+        for bit in iter_bits(clause[0]):
+            pos_occurs[bit].add(clause)
+        for bit in iter_bits(clause[1]):
+            neg_occurs[bit].add(clause)
+    
+    for clause in encoded:
+        if clause == (0, 0):
+            if trace:
+                derivation_steps.append(f"Empty clause derived - proof complete!")
+            return True, derivation_steps
+        if not clause[0] & clause[1]:  # Skip tautologies
+            add_clause(clause)
+    
+    # Unit propagation: striking the complement of a unit literal from a clause is
+    # linear-time resolution, and the shorter clause subsumes the original
+    unit_queue = [c for c in unprocessed if clause_length(c) == 1]
+    while unit_queue:
+        unit = unit_queue.pop()
+        if unit not in alive:
+            continue
+        unit_pos, unit_neg = unit
+        complements = neg_occurs[unit_pos] if unit_pos else pos_occurs[unit_neg]
+        for other in list(complements):
+            if other not in alive:
+                continue
+            reduced = (other[0] & ~unit_neg, other[1] & ~unit_pos)
+            if trace:
+                derivation_steps.append(f"Unit propagation: Resolved {decode_clause(unit, atoms)} and "
+                                        f"{decode_clause(other, atoms)} to get {decode_clause(reduced, atoms)}")
+            if reduced == (0, 0):
+                if trace:
+                    derivation_steps.append(f"Empty clause derived - proof complete!")
+                return True, derivation_steps
+            add_clause(reduced)
+            if clause_length(reduced) == 1:
+                unit_queue.append(reduced)
+    
+    # Pure literal rule: a clause holding a literal whose complement occurs nowhere
+    # can never take part in a refutation. Removing it may make other literals pure.
+    pure_candidates = set(pos_occurs) | set(neg_occurs)
+    while pure_candidates:
+        bit = pure_candidates.pop()
+        pos_bucket, neg_bucket = pos_occurs.get(bit), neg_occurs.get(bit)
+        if bool(pos_bucket) == bool(neg_bucket):
+            continue  # Occurs in both polarities, or not at all any more
+        for other in list(pos_bucket or neg_bucket):
+            if trace:
+                derivation_steps.append(f"Pure literal: Removed {decode_clause(other, atoms)}")
+            remove_clause(other)
+            pure_candidates.update(iter_bits(other[0] | other[1]))
+    
+    # Resolvents longer than this are set aside until the shorter search space is exhausted
+    max_len = 2 * max((clause_length(c) for c in encoded), default=1)
+    
+    while True:
+        if not unprocessed:
+            if not deferred:
+                break
+            # Saturated under the length limit - relax it and bring back the long resolvents
+            max_len *= 2
+            for clause in [c for c in deferred if clause_length(c) <= max_len]:
+                deferred.discard(clause)
+                add_clause(clause)
+            continue
+        
+        given = heappop(queue)[2]
+        if given not in unprocessed:
+            continue  # Stale heap entry, removed by backward subsumption
+        unprocessed.discard(given)
         iteration += 1
-        clause_list = list(clauses)
-        new_clauses = set()
+        given_pos, given_neg = given
+        
+        # Only processed clauses holding a complementary literal can resolve with given
+        candidates = set()
+        for bit in iter_bits(given_pos):
+            candidates.update(neg_processed.get(bit, ()))
+        for bit in iter_bits(given_neg):
+            candidates.update(pos_processed.get(bit, ()))
         
-        # Try to resolve all pairs of clauses
-        for i in range(len(clause_list)):
-            for j in range(i + 1, len(clause_list)):
-                clause1, clause2 = clause_list[i], clause_list[j]
-                resolvents = resolve(clause1, clause2)
+        for other in candidates:
+            if other not in alive:
+                continue  # Removed by backward subsumption during this step
+            for resolvent in resolve_masks(given, other):
+                if trace:
+                    derivation_steps.append(f"Iteration {iteration}: Resolved {decode_clause(given, atoms)} and "
+                                            f"{decode_clause(other, atoms)} to get {decode_clause(resolvent, atoms)}")
                 
-                for resolvent in resolvents:
-                    derivation_steps.append(f"Iteration {iteration}: Resolved {clause1} and {clause2} to get {resolvent}")
-                    
-                    if resolvent.is_empty():
-                        # Found contradiction - query is entailed
+                if resolvent == (0, 0):
+                    # Found contradiction - query is entailed
+                    if trace:
                         derivation_steps.append(f"Empty clause derived - proof complete!")
-                        return True, derivation_steps
-                    
-                    new_clauses.add(resolvent)
-        
-        # If no new clauses were generated, we can't prove the query
-        if new_clauses.issubset(clauses):
-            derivation_steps.append(f"No new clauses generated after {iteration} iterations - cannot prove query")
-            return False, derivation_steps
+                    return True, derivation_steps
+                
+                if clause_length(resolvent) > max_len:
+                    deferred.add(resolvent)
+                else:
+                    add_clause(resolvent)
+            
+            if given not in alive:
+                break  # A resolvent subsumed the given clause itself
         
-        clauses.update(new_clauses)
+        if given in alive:
+            processed.add(given)
+            for bit in iter_bits(given_pos):
+                pos_processed[bit].add(given)
+            for bit in iter_bits(given_neg):
+                neg_processed[bit].add(given)
         
-        # Optional: limit clause set size to prevent explosion
-        if len(clauses) > 10000:
-            derivation_steps.append("Clause set too large - terminating")
-            return False, derivation_steps
+        # Last-resort guard against clause explosion; gave up, so neither YES nor NO
+        if len(processed) + len(unprocessed) + len(deferred) > RESOLUTION_CLAUSE_LIMIT:
+            if trace:
+                derivation_steps.append("Clause set too large - terminating")
+            return None, derivation_steps
     
-    derivation_steps.append(f"Maximum iterations ({max_iterations}) reached")
+    # Every clause has been processed without deriving the empty clause
+    if trace:
+        derivation_steps.append(f"No new clauses generated after {iteration} iterations - cannot prove query")
     return False, derivation_steps
 
 def convert_horn_kb_to_clauses(kb):
-    """Convert Horn clause knowledge base to resolution clauses"""
+    """Convert Horn clause knowledge base to resolution clauses (cached on the KB)"""
+    if kb.clause_cache is not None:
+        return set(kb.clause_cache)
+    
     clauses = set()
     
     # Convert facts to unit clauses
@@ -261,4 +575,9 @@ def convert_horn_kb_to_clauses(kb):
     
     # Convert rules to clauses
     for rule in kb.rules:
-        # Convert# Fixed parser.py - Handle complex queries properly
\ No newline at end of file
+        # Convert p & q => r to ~p || ~q || r
+        literals = ['~' + premise for premise in rule.premises_set] + [rule.conclusion]
+        clauses.add(Clause(literals))
+    
+    kb.clause_cache = frozenset(clauses)
+    return clauses
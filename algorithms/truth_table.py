@@ -1,7 +1,9 @@
 # Fixed truth_table.py - Key issues resolved
 
-from itertools import product
+from collections import defaultdict
 from knowledge_base import *
+from parser import atoms_of_kb
+from algorithms.resolution_prover import convert_general_kb_to_clauses, negate_literal
 
 def truth_table(kb, query):
     """
@@ -18,10 +20,8 @@ def truth_table(kb, query):
 def general_truth_table(kb, query):
     """Truth table method for general propositional logic - FIXED VERSION"""
     # Collect all atoms from the knowledge base and query
-    all_atoms = set()
-    
-    for sentence in kb.sentences:
-        all_atoms.update(extract_atoms_from_expr(sentence))
+    # (memoized per sentence, so repeated queries don't re-walk the KB)
+    all_atoms = atoms_of_kb(kb)
     
     # CRITICAL FIX: Handle query properly - it might be a complex expression
     if hasattr(query, 'symbol'):  # It's an Atom object
@@ -37,93 +37,261 @@ def general_truth_table(kb, query):
     # Convert to sorted list for consistent ordering
     atoms = sorted(list(all_atoms))
     
+    # Unit propagation: literals it derives from the KB's clauses hold in every
+    # model, so only the remaining atoms need enumerating (the count is unchanged)
+    forced = forced_literals(kb)
+    if forced is None:
+        # Propagation reached an empty clause - KB is inconsistent
+        return True, 0
+    # Definitional atoms of the clause form are not part of the truth table
+    forced = {atom: value for atom, value in forced.items() if atom in all_atoms}
+    
     # Early termination for large problems
-    if len(atoms) > 25:
-        return None, f"Too many variables ({len(atoms)}) for truth table method."
+    unforced = len(atoms) - len(forced)
+    if unforced > 25:
+        return None, f"Too many variables ({unforced}) for truth table method."
     
-    # Generate all possible truth value assignments
-    valid_models = []
+    # Evaluate every sentence over a whole block of models at once: bit m of an atom's
+    # column is its truth value in model m, so connectives become bitwise operations.
+    # The KB's valid models are reused while the KB is unchanged and further
+    # queries range over the same atoms.
+    cached = kb.model_cache[1] if kb.model_cache is not None and kb.model_cache[0] == atoms else None
+    valid_blocks = []
+    valid_models = 0
+    result = True
     
-    # Check each possible truth assignment
-    for values in product([True, False], repeat=len(atoms)):
-        model = dict(zip(atoms, values))
+    for block, (columns, all_models) in enumerate(model_blocks(atoms, forced)):
+        shared = {}  # structure -> (number, column) of every subexpression evaluated so far
+        
+        # Models that satisfy ALL sentences in the knowledge base
+        if cached is not None:
+            valid = cached[block]
+        else:
+            valid = all_models
+            for sentence in kb.sentences:
+                valid &= evaluate_columns(sentence, columns, all_models, shared)
+                if not valid:
+                    break  # No model left in this block, the remaining sentences cannot change that
+        valid_blocks.append(valid)
+        if not valid:
+            continue
+        
+        # CRITICAL FIX: Proper query evaluation
+        if query_symbol:
+            # Simple query - just check the symbol
+            query_true = columns[query_symbol]
+        else:
+            # Complex query - evaluate the full expression
+            query_true = evaluate_columns(query, columns, all_models, shared)
         
-        # Check if this model satisfies ALL sentences in the knowledge base
-        if satisfies_general_kb(kb, model):
-            valid_models.append(model)
+        # Query is entailed iff it's true in ALL models that satisfy the KB
+        if valid & ~query_true:
+            result = False
+        valid_models += valid.bit_count()
+    
+    kb.model_cache = (atoms, valid_blocks)
     
     # Handle inconsistent KB
     if not valid_models:
         # If KB is inconsistent (no satisfying models), it entails everything
         return True, 0
     
-    # CRITICAL FIX: Proper query evaluation
-    if query_symbol:
-        # Simple query - just check the symbol
-        query_true_models = sum(1 for model in valid_models if model.get(query_symbol, False))
-    else:
-        # Complex query - evaluate the full expression
-        query_true_models = sum(1 for model in valid_models if evaluate_expression(query, model))
-    
-    # Query is entailed iff it's true in ALL models that satisfy the KB
-    result = query_true_models == len(valid_models)
+    return result, valid_models
+
+def atom_columns(atoms):
+    """
+    Truth value of each atom across all 2^n models, as an int with one bit per model.
+    Atom i is true in model m iff bit i of m is set.
+    """
+    num_models = 1 << len(atoms)
+    columns = {}
+    for i, atom in enumerate(atoms):
+        # 2^i false models then 2^i true models, repeated over the whole table
+        half = 1 << i
+        column = ((1 << half) - 1) << half
+        width = half << 1
+        while width < num_models:
+            column |= column << width
+            width <<= 1
+        columns[atom] = column
+    return columns
+
+# The free atoms beyond the first BLOCK_ATOMS are fixed per block, so a column never
+# holds more than 2^BLOCK_ATOMS models (128 KB) however many atoms are enumerated
+BLOCK_ATOMS = 20
+
+def model_blocks(atoms, forced):
+    """Yield (columns, all_models) for each block of the truth table (see table_columns)"""
+    free_atoms = [atom for atom in atoms if atom not in forced]
+    outer_atoms = free_atoms[BLOCK_ATOMS:]
+    for block in range(1 << len(outer_atoms)):
+        block_forced = dict(forced)
+        for i, atom in enumerate(outer_atoms):
+            block_forced[atom] = bool(block >> i & 1)
+        yield table_columns(atoms, block_forced)
+
+def table_columns(atoms, forced):
+    """
+    Columns for a truth table over atoms whose values in forced (atom -> bool) are fixed:
+    only the other atoms are enumerated, and forced ones get constant columns.
+    Returns (columns, all_models) where all_models has one bit per enumerated model.
+    """
+    free_atoms = [atom for atom in atoms if atom not in forced]
+    columns = atom_columns(free_atoms)
+    all_models = (1 << (1 << len(free_atoms))) - 1
+    for atom in atoms:
+        if atom in forced:
+            columns[atom] = all_models if forced[atom] else 0
+    return columns, all_models
+
+def forced_literals(kb):
+    """
+    Unit propagation over the KB's resolution clauses: each unit literal is assigned,
+    clauses it satisfies are dropped and its complement is removed from the rest,
+    until no unit clause is left.
+    Returns atom -> bool (definitional atoms included), or None on a conflict.
+    """
+    clauses = [clause.literals for clause in convert_general_kb_to_clauses(kb)]
+    occurs = defaultdict(list)  # literal -> indices of the clauses containing it
+    for i, literals in enumerate(clauses):
+        if not literals:
+            return None
+        for lit in literals:
+            occurs[lit].append(i)
+    open_literals = [len(literals) for literals in clauses]  # not yet assigned false
+    satisfied = [False] * len(clauses)
+    pending = [next(iter(literals)) for literals in clauses if len(literals) == 1]
     
-    return result, len(valid_models)
+    forced = {}
+    while pending:
+        lit = pending.pop()
+        atom, value = (lit[1:], False) if lit[0] == '~' else (lit, True)
+        if atom in forced:
+            if forced[atom] != value:
+                return None
+            continue
+        forced[atom] = value
+        for i in occurs[lit]:
+            satisfied[i] = True
+        for i in occurs[negate_literal(lit)]:
+            if satisfied[i]:
+                continue
+            open_literals[i] -= 1
+            if open_literals[i] == 0:
+                return None
+            if open_literals[i] == 1:
+                # Exactly one literal of the clause is still unassigned
+                pending.append(next(l for l in clauses[i]
+                                    if (l[1:] if l[0] == '~' else l) not in forced))
+    return forced
 
-def satisfies_general_kb(kb, model):
-    """Check if a model satisfies all sentences in the general knowledge base"""
-    for sentence in kb.sentences:
-        if not evaluate_expression(sentence, model):
-            return False
-    return True
+def horn_consequences(kb):
+    """Facts plus every conclusion forward chaining can reach from them"""
+    derived = set(kb.facts)
+    pending = list(kb.rules)
+    changed = True
+    while changed:
+        changed = False
+        waiting = []
+        for rule in pending:
+            if rule.conclusion in derived:
+                continue
+            if derived.issuperset(rule.premises_set):
+                derived.add(rule.conclusion)
+                changed = True
+            else:
+                waiting.append(rule)
+        pending = waiting
+    return derived
+
+def evaluate_columns(expr, columns, all_models, shared=None):
+    """
+    Evaluate an expression over every model at once, given the atom columns
+    shared: dict kept across calls, so subexpressions that are structurally equal
+    to one seen before (in another sentence or the query) are not evaluated again
+    """
+    if shared is None:
+        shared = {}
+    uids = {}    # id(subexpression) -> number of its structure in shared
+    values = {}  # id(subexpression) -> its column
+    stack = [(expr, False)]
+    
+    while stack:
+        e, expanded = stack.pop()
+        if id(e) in uids:
+            continue
+        
+        if isinstance(e, Atom):
+            structure = e.symbol
+        elif isinstance(e, Negation):
+            if not expanded:
+                stack.append((e, True))
+                stack.append((e.operand, False))
+                continue
+            if isinstance(e.operand, Negation):
+                # ~~p is p
+                inner = id(e.operand.operand)
+                uids[id(e)], values[id(e)] = uids[inner], values[inner]
+                continue
+            structure = (Negation, uids[id(e.operand)])
+        elif isinstance(e, (Conjunction, Disjunction, Implication, Biconditional)):
+            if not expanded:
+                stack.append((e, True))
+                stack.append((e.right, False))
+                stack.append((e.left, False))
+                continue
+            left_uid, right_uid = uids[id(e.left)], uids[id(e.right)]
+            if not isinstance(e, Implication) and left_uid > right_uid:
+                # &, || and <=> are commutative, so p & q and q & p share one entry
+                left_uid, right_uid = right_uid, left_uid
+            structure = (type(e), left_uid, right_uid)
+        else:
+            raise ValueError(f"Unknown expression type: {type(e)}")
+        
+        entry = shared.get(structure)
+        if entry is None:
+            if isinstance(e, Atom):
+                column = columns.get(e.symbol, 0)
+            elif isinstance(e, Negation):
+                column = all_models & ~values[id(e.operand)]
+            else:
+                left_val, right_val = values[id(e.left)], values[id(e.right)]
+                if isinstance(e, Conjunction):
+                    column = left_val & right_val
+                elif isinstance(e, Disjunction):
+                    column = left_val | right_val
+                elif isinstance(e, Implication):
+                    # p => q is equivalent to ~p || q
+                    column = (all_models & ~left_val) | right_val
+                else:
+                    # p <=> q is true iff p and q have the same truth value
+                    column = all_models & ~(left_val ^ right_val)
+            entry = shared[structure] = (len(shared), column)
+        uids[id(e)], values[id(e)] = entry
+    
+    return values[id(expr)]
 
 def evaluate_expression(expr, model):
     """Evaluate a logical expression given a truth assignment - IMPROVED VERSION"""
-    if isinstance(expr, Atom):
-        return model.get(expr.symbol, False)
-    
-    elif isinstance(expr, Negation):
-        return not evaluate_expression(expr.operand, model)
-    
-    elif isinstance(expr, Conjunction):
-        left_val = evaluate_expression(expr.left, model)
-        right_val = evaluate_expression(expr.right, model)
-        return left_val and right_val
-    
-    elif isinstance(expr, Disjunction):
-        left_val = evaluate_expression(expr.left, model)
-        right_val = evaluate_expression(expr.right, model)
-        return left_val or right_val
-    
-    elif isinstance(expr, Implication):
-        # p => q is equivalent to ~p || q
-        left_val = evaluate_expression(expr.left, model)
-        right_val = evaluate_expression(expr.right, model)
-        return (not left_val) or right_val
-    
-    elif isinstance(expr, Biconditional):
-        # p <=> q is true iff p and q have the same truth value
-        left_val = evaluate_expression(expr.left, model)
-        right_val = evaluate_expression(expr.right, model)
-        return left_val == right_val
-    
-    else:
-        raise ValueError(f"Unknown expression type: {type(expr)}")
+    # A single model is a one-row truth table: every column is one bit
+    columns = {atom: 1 for atom, value in model.items() if value}
+    return evaluate_columns(expr, columns, 1) == 1
 
 def extract_atoms_from_expr(expr):
     """Extract all atomic propositions from a logical expression"""
     atoms = set()
+    stack = [expr]
     
-    def collect_atoms(e):
+    while stack:
+        e = stack.pop()
         if isinstance(e, Atom):
             atoms.add(e.symbol)
         elif isinstance(e, Negation):
-            collect_atoms(e.operand)
+            stack.append(e.operand)
         elif hasattr(e, 'left') and hasattr(e, 'right'):  # Binary expressions
-            collect_atoms(e.left)
-            collect_atoms(e.right)
+            stack.append(e.left)
+            stack.append(e.right)
     
-    collect_atoms(expr)
     return atoms
 
 def horn_truth_table(kb, query):
@@ -145,47 +313,51 @@ def horn_truth_table(kb, query):
     # Convert to sorted list for consistent ordering
     symbols = sorted(list(symbols))
     
+    # Facts and everything forward chaining derives from them are true in every
+    # model, so only the remaining symbols need enumerating (the count is unchanged)
+    forced = dict.fromkeys(horn_consequences(kb), True)
+    
     # Early termination if too many symbols
-    if len(symbols) > 25:
-        return None, f"Too many variables ({len(symbols)}) for truth table method."
+    unforced = len(symbols) - len(forced)
+    if unforced > 25:
+        return None, f"Too many variables ({unforced}) for truth table method."
     
-    # Generate all possible truth value assignments
-    valid_models = []
+    # Evaluate a whole block of the table at once: bit m of a symbol's column is its truth value in model m
+    cached = kb.model_cache[1] if kb.model_cache is not None and kb.model_cache[0] == symbols else None
+    valid_blocks = []
+    valid_models = 0
+    result = True
     
-    # Check each possible truth assignment
-    for values in product([True, False], repeat=len(symbols)):
-        model = dict(zip(symbols, values))
+    for block, (columns, all_models) in enumerate(model_blocks(symbols, forced)):
+        if cached is not None:
+            # Same KB and symbols as the last query, so the same valid models
+            valid = cached[block]
+        else:
+            # All facts must be true
+            valid = all_models
+            for fact in kb.facts:
+                valid &= columns[fact]
+            
+            # A rule (premises => conclusion) is satisfied if some premise is false OR conclusion is true
+            # (premises only need checking in models that are still valid)
+            for rule in kb.rules:
+                if not valid:
+                    break  # No model left in this block, the remaining rules cannot change that
+                premises_true = valid
+                for premise in rule.premises:
+                    premises_true &= columns[premise]
+                valid &= ~premises_true | columns[rule.conclusion]
+        valid_blocks.append(valid)
         
-        # Check if this model satisfies the knowledge base
-        if satisfies_horn_kb(kb, model):
-            valid_models.append(model)
+        # Query is entailed iff it's true in ALL valid models
+        if valid & ~columns[query]:
+            result = False
+        valid_models += valid.bit_count()
+    
+    kb.model_cache = (symbols, valid_blocks)
     
     # Handle inconsistent KB
     if not valid_models:
         return True, 0
     
-    # Count models where query is true
-    query_true_models = sum(1 for model in valid_models if model.get(query, False))
-    
-    # Query is entailed iff it's true in ALL valid models
-    result = query_true_models == len(valid_models)
-    
-    return result, len(valid_models)
-
-def satisfies_horn_kb(kb, model):
-    """Check if a given model satisfies the Horn clause knowledge base"""
-    # Check if all facts are true in the model
-    for fact in kb.facts:
-        if not model.get(fact, False):
-            return False
-    
-    # Check if all rules are satisfied
-    for rule in kb.rules:
-        # A rule (premises => conclusion) is satisfied if:
-        # either some premise is false OR conclusion is true
-        premises_true = all(model.get(premise, False) for premise in rule.premises)
-        
-        if premises_true and not model.get(rule.conclusion, False):
-            return False
-    
-    return True
+    return result, valid_models
@@ -3,18 +3,49 @@
 
 import sys
 import os
+import io
+import json
+import struct
+import contextlib
+from collections import defaultdict
 from parser import parse_file, extract_atoms
-from knowledge_base import KnowledgeBase, GeneralKnowledgeBase
+from knowledge_base import KnowledgeBase, GeneralKnowledgeBase, Clause
+from knowledge_base import Atom, Negation, Conjunction, Disjunction, Implication, Biconditional
 from algorithms import forward_chaining, backward_chaining
 from algorithms import truth_table
 
 # Import the enhanced resolution prover
 try:
     from algorithms.resolution_prover import resolution_theorem_proving as enhanced_resolution
+    from algorithms.resolution_prover import convert_to_cnf, extract_clauses_from_cnf
     ENHANCED_RESOLUTION_AVAILABLE = True
 except ImportError:
     ENHANCED_RESOLUTION_AVAILABLE = False
 
+# Worker-mode messages use orjson when it is installed, else the standard json module
+try:
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:
+    def json_dumps(obj):
+        return json.dumps(obj).encode()
+    json_loads = json.loads
+
+FRAME_HEADER = struct.Struct("<I")  # byte length prefixed to every worker-mode message
+
+def read_frame(stream):
+    """Next length-prefixed message from a binary stream, or None at EOF"""
+    header = stream.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        return None
+    (length,) = FRAME_HEADER.unpack(header)
+    payload = stream.read(length)
+    return payload if len(payload) == length else None
+
+def write_frame(stream, payload):
+    """Write one length-prefixed message to a binary stream and flush it"""
+    stream.write(FRAME_HEADER.pack(len(payload)) + payload)
+    stream.flush()
+
 def find_file(filename):
     """
     Enhanced file finding logic:
@@ -34,14 +65,15 @@ def find_file(filename):
     # If neither exists, return None
     return None
 
-def resolution_theorem_proving(kb, query):
+def resolution_theorem_proving(kb, query, trace=False):
     """
     Resolution-based theorem prover - uses enhanced version if available
-    Returns: (result, derivation_info)
+    trace: collect derivation steps (only needed for verbose output)
+    Returns: (result, derivation_info), result None if the prover gave up
     """
     if ENHANCED_RESOLUTION_AVAILABLE:
         # Use the enhanced resolution prover
-        return enhanced_resolution(kb, query)
+        return enhanced_resolution(kb, query, trace)
     else:
         # Fallback to simplified version
         return simple_resolution_theorem_proving(kb, query)
@@ -51,8 +83,6 @@ def simple_resolution_theorem_proving(kb, query):
     Simplified resolution-based theorem prover (fallback)
     Returns: (result, derivation_info)
     """
-    from knowledge_base import Clause
-    
     # Convert KB sentences to CNF and extract clauses
     clauses = set()
     
@@ -68,106 +98,294 @@ def simple_resolution_theorem_proving(kb, query):
         
         for rule in kb.rules:
             # Convert p & q => r to ~p || ~q || r
-            literals = ['~' + premise for premise in rule.premises] + [rule.conclusion]
+            literals = ['~' + premise for premise in rule.premises_set] + [rule.conclusion]
             clauses.add(Clause(literals))
     
     # Add negation of query to prove by contradiction
     negated_query = Clause(['~' + query])
     clauses.add(negated_query)
     
-    # Simple resolution loop
+    # Encode each clause as (pos_mask, neg_mask), with bit i set when atom i occurs
+    # positively / negatively, so resolution and tautology tests are int operations
+    atom_bits = {}
+    encoded = set()
+    for clause in clauses:
+        pos_mask = neg_mask = 0
+        for lit in clause.literals:
+            negative = lit[0] == '~'
+            bit = atom_bits.setdefault(lit[1:] if negative else lit, 1 << len(atom_bits))
+            if negative:
+                neg_mask |= bit
+            else:
+                pos_mask |= bit
+        if not pos_mask & neg_mask:  # Tautologies can never help derive the empty clause
+            encoded.add((pos_mask, neg_mask))
+    
+    # Simple resolution loop: each round resolves the clauses derived in the previous
+    # round against everything indexed so far, so no pair is ever tried twice
     max_iterations = 100
     iteration = 0
+    by_pos = defaultdict(set)  # atom bit -> indexed clauses with it positive
+    by_neg = defaultdict(set)  # atom bit -> indexed clauses with it negative
+    pos_occurs = defaultdict(set)  # atom bit -> every kept clause with it positive
+    neg_occurs = defaultdict(set)  # atom bit -> every kept clause with it negative
+    removed = set()  # Kept clauses later found to be subsumed
+    
+    def literal_buckets(clause):
+        pos_mask, neg_mask = clause
+        for mask, index in ((pos_mask, pos_occurs), (neg_mask, neg_occurs)):
+            while mask:
+                bit = mask & -mask
+                yield index[bit]
+                mask ^= bit
+    
+    def subsumed(clause):
+        pos_mask, neg_mask = clause
+        for bucket in literal_buckets(clause):
+            for other in bucket:
+                if not (other[0] & ~pos_mask or other[1] & ~neg_mask):
+                    return True
+        return False
+    
+    def keep(clause):
+        """Index a clause for subsumption, dropping kept clauses it subsumes"""
+        pos_mask, neg_mask = clause
+        buckets = list(literal_buckets(clause))
+        # Any superset of the clause must appear in its rarest literal's bucket
+        for other in list(min(buckets, key=len)):
+            if other != clause and not (pos_mask & ~other[0] or neg_mask & ~other[1]):
+                removed.add(other)
+                for bucket in literal_buckets(other):
+                    bucket.discard(other)
+                for mask, index in ((other[0], by_pos), (other[1], by_neg)):
+                    while mask:
+                        bit = mask & -mask
+                        index[bit].discard(other)
+                        mask ^= bit
+        for bucket in buckets:
+            bucket.add(clause)
+    
+    initial = sorted(encoded, key=lambda c: bin(c[0]).count('1') + bin(c[1]).count('1'))
+    new_clauses = []
+    for clause in initial:
+        if not subsumed(clause):
+            keep(clause)
+            new_clauses.append(clause)
     
     while iteration < max_iterations:
         iteration += 1
-        clause_list = list(clauses)
-        new_clauses = set()
+        resolvents_found = []
         
-        # Try to resolve all pairs
-        for i in range(len(clause_list)):
-            for j in range(i + 1, len(clause_list)):
-                resolvents = resolve_clauses(clause_list[i], clause_list[j])
-                
-                for resolvent in resolvents:
-                    if resolvent.is_empty():
+        for clause in new_clauses:
+            if clause in removed:
+                continue
+            pos_mask, neg_mask = clause
+            
+            # Only clauses holding a complementary literal can resolve with this one
+            candidates = set()
+            for mask, index in ((pos_mask, by_neg), (neg_mask, by_pos)):
+                while mask:
+                    bit = mask & -mask
+                    candidates.update(index.get(bit, ()))
+                    mask ^= bit
+            
+            for other in candidates:
+                for resolvent in resolve_clauses(clause, other):
+                    if resolvent == (0, 0):
                         return True, f"Proof found in {iteration} iterations"
-                    new_clauses.add(resolvent)
+                    if resolvent not in encoded:
+                        encoded.add(resolvent)
+                        # Forward subsumption: a kept subset makes the resolvent redundant
+                        if not subsumed(resolvent):
+                            keep(resolvent)
+                            resolvents_found.append(resolvent)
+                if clause in removed:
+                    break  # A resolvent subsumed this clause; stop using it
+            
+            if clause in removed:
+                continue
+            for mask, index in ((pos_mask, by_pos), (neg_mask, by_neg)):
+                while mask:
+                    bit = mask & -mask
+                    index[bit].add(clause)
+                    mask ^= bit
         
         # If no new clauses, we can't prove it
-        if new_clauses.issubset(clauses):
+        if not resolvents_found:
             return False, f"No proof found after {iteration} iterations"
         
-        clauses.update(new_clauses)
+        new_clauses = resolvents_found
     
     return False, f"Timeout after {max_iterations} iterations"
 
 def convert_to_cnf_clauses(expr):
     """Convert expression to CNF clauses using proper CNF conversion"""
     if ENHANCED_RESOLUTION_AVAILABLE:
-        from algorithms.resolution_prover import convert_to_cnf, extract_clauses_from_cnf
         cnf = convert_to_cnf(expr)
         return extract_clauses_from_cnf(cnf)
     else:
-        # Simplified fallback
-        from knowledge_base import Clause, Atom, Negation, Conjunction, Disjunction, Implication
-        
-        if isinstance(expr, Atom):
-            return [Clause([expr.symbol])]
-        elif isinstance(expr, Negation) and isinstance(expr.operand, Atom):
-            return [Clause(['~' + expr.operand.symbol])]
-        elif isinstance(expr, Implication):
-            # p => q becomes ~p || q (simplified)
-            literals = ['~' + str(expr.left), str(expr.right)]
-            return [Clause(literals)]
-        else:
-            # For other cases, return a simple clause
-            return [Clause([str(expr)])]
+        return [Clause(literals) for literals in cnf_literal_sets(expr)]
 
-def resolve_clauses(clause1, clause2):
-    """Attempt to resolve two clauses"""
-    from knowledge_base import Clause
+def cnf_literal_sets(expr, negated=False, memo=None):
+    """
+    Clauses (frozensets of literal strings) of the CNF of expr, or of ~expr when
+    negated. Negations are pushed to the atoms on the way down and OR is
+    distributed over AND on the way up; tautological clauses are dropped.
+    memo maps (id(subexpression), negated) to its clauses, so shared subtrees
+    are converted once.
+    """
+    if memo is None:
+        memo = {}
+    key = (id(expr), negated)
+    if key in memo:
+        return memo[key]
     
-    resolvents = []
+    def conjoin(*parts):
+        return set().union(*parts)
     
-    # Find complementary literals
-    for lit1 in clause1.literals:
-        if lit1.startswith('~'):
-            complement = lit1[1:]  # Remove ~
+    def disjoin(left, right):
+        result = set()
+        for c1 in left:
+            for c2 in right:
+                clause = c1 | c2
+                if not any(('~' + lit) in clause for lit in clause if lit[0] != '~'):
+                    result.add(clause)
+        return result
+    
+    def sub(e, neg):
+        return cnf_literal_sets(e, neg, memo)
+    
+    if isinstance(expr, Atom):
+        clauses = {frozenset(['~' + expr.symbol if negated else expr.symbol])}
+    elif isinstance(expr, Negation):
+        clauses = sub(expr.operand, not negated)
+    elif isinstance(expr, Conjunction):
+        # ~(a & b) is ~a || ~b
+        left, right = sub(expr.left, negated), sub(expr.right, negated)
+        clauses = disjoin(left, right) if negated else conjoin(left, right)
+    elif isinstance(expr, Disjunction):
+        # ~(a || b) is ~a & ~b
+        left, right = sub(expr.left, negated), sub(expr.right, negated)
+        clauses = conjoin(left, right) if negated else disjoin(left, right)
+    elif isinstance(expr, Implication):
+        # a => b is ~a || b; its negation is a & ~b
+        if negated:
+            clauses = conjoin(sub(expr.left, False), sub(expr.right, True))
         else:
-            complement = '~' + lit1  # Add ~
-        
-        if complement in clause2.literals:
-            # Resolve on this literal
-            new_literals = (clause1.literals - {lit1}) | (clause2.literals - {complement})
-            resolvents.append(Clause(new_literals))
+            clauses = disjoin(sub(expr.left, True), sub(expr.right, False))
+    elif isinstance(expr, Biconditional):
+        # a <=> b is (~a || b) & (a || ~b); its negation is (a || b) & (~a || ~b)
+        pos_left, neg_left = sub(expr.left, False), sub(expr.left, True)
+        pos_right, neg_right = sub(expr.right, False), sub(expr.right, True)
+        if negated:
+            clauses = conjoin(disjoin(pos_left, pos_right), disjoin(neg_left, neg_right))
+        else:
+            clauses = conjoin(disjoin(neg_left, pos_right), disjoin(pos_left, neg_right))
+    else:
+        raise ValueError(f"Unsupported expression: {expr}")
+    
+    memo[key] = clauses
+    return clauses
+
+def resolve_clauses(clause1, clause2):
+    """
+    Attempt to resolve two (pos_mask, neg_mask) clauses, yielding resolvents
+    one at a time so the caller can stop as soon as the empty clause appears
+    """
+    pos1, neg1 = clause1
+    pos2, neg2 = clause2
     
-    return resolvents
+    # Atoms positive in one clause and negative in the other
+    clashes = (pos1 & neg2) | (neg1 & pos2)
+    if clashes & (clashes - 1):
+        # Two or more clashing atoms: resolving on one leaves the other as a tautology
+        return
+    if clashes:
+        yield ((pos1 | pos2) & ~clashes, (neg1 | neg2) & ~clashes)
 
 def main():
+    if len(sys.argv) == 2 and sys.argv[1] == "--serve":
+        serve()
+        return
+    
     if len(sys.argv) < 3:
         print("Usage: python iengine.py <filename> <method> [options]")
         print("Methods: FC (Forward Chaining), BC (Backward Chaining), TT (Truth Table), RES (Resolution)")
         print("Options: -v (verbose mode for resolution)")
+        print("       python iengine.py --serve  (answer framed JSON jobs on stdin, see serve())")
         print("Note: FC and BC work only with Horn clauses. TT and RES work with general propositional logic.")
         return
 
     filename = sys.argv[1]
     method = sys.argv[2].upper()
     verbose = len(sys.argv) > 3 and '-v' in sys.argv
+    run(filename, method, verbose)
+
+def serve(requests=None, responses=None):
+    """
+    Long-running worker mode: each length-prefixed JSON message on stdin is a job
+    {"file": ..., "method": ... [, "verbose": ...]} and gets one message {"output": ...}
+    back holding exactly what the command line would have printed. Ends at EOF.
+    requests/responses: binary streams, stdin and stdout by default
+    """
+    requests = requests or sys.stdin.buffer
+    responses = responses or sys.stdout.buffer
+    parsed = {}  # the KB of the file last asked about, reused while that file is unchanged
+    last_seen = None
+    while True:
+        message = read_frame(requests)
+        if message is None:
+            break
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            try:
+                job = json_loads(message)
+                try:
+                    seen = (job["file"], os.stat(job["file"]).st_mtime_ns)
+                except OSError:
+                    seen = None
+                if seen is None or seen != last_seen:
+                    parsed = {}
+                last_seen = seen
+                run(job["file"], job["method"], job.get("verbose", False), parsed)
+            except Exception as e:
+                print(f"Error during execution: {e}")
+        write_frame(responses, json_dumps({"output": buffer.getvalue()}))
 
+def run(filename, method, verbose=False, parsed=None):
+    """
+    Answer the query in filename with method, printing the result exactly as the
+    command line does (callers such as the test framework use this in-process)
+    parsed: optional dict mapping filename -> (kb, query), filled and reused so that
+    several methods on one file parse it once
+    """
+    loaded = parsed.get(filename) if parsed is not None else None
+    if loaded is None:
+        loaded = load(filename)
+        if loaded is None:
+            return
+        if parsed is not None:
+            parsed[filename] = loaded
+    solve(loaded[0], loaded[1], method, verbose)
+
+def load(filename):
+    """Find and parse filename, returning (kb, query), or None after printing why not"""
     # Enhanced file finding
     actual_filename = find_file(filename)
     if actual_filename is None:
         print(f"Error: File '{filename}' not found in current directory or tests/ directory.")
-        return
+        return None
 
     try:
         # Parse the file (automatically detects Horn vs General)
-        kb, query = parse_file(actual_filename)
+        return parse_file(actual_filename)
     except Exception as e:
         print(f"Error parsing file: {e}")
-        return
+        return None
+
+def solve(kb, query, method, verbose=False):
+    """Answer query against an already parsed kb with method, printing the result"""
+    method = method.upper()
     
     # Determine KB type for user feedback
     is_general = isinstance(kb, GeneralKnowledgeBase)
@@ -213,8 +431,11 @@ def main():
                 
         elif method == "RES":
             # Resolution works with both types
-            result, info = resolution_theorem_proving(kb, query)
-            if result:
+            result, info = resolution_theorem_proving(kb, query, trace=verbose)
+            if result is None:
+                # The prover hit its clause limit, which says nothing about entailment
+                print("Error: Resolution gave up - clause set too large to decide the query")
+            elif result:
                 if isinstance(info, list):  # Enhanced version returns list of steps
                     print("YES: Proof by resolution")
                     if verbose:
@@ -1,12 +1,17 @@
 # knowledge_base.py - Enhanced to support both Horn clauses and general propositional logic
 
+from itertools import count
+
 class Rule:
     """
     Represents a Horn clause rule.
     Example: a & b => c
     """
+    __slots__ = ('premises', 'premises_set', 'conclusion')
+    
     def __init__(self, premises, conclusion):
         self.premises = premises  # list of symbols
+        self.premises_set = frozenset(premises)  # same symbols, for one-shot subset tests
         self.conclusion = conclusion  # single symbol
 
 class KnowledgeBase:
@@ -16,23 +21,38 @@ class KnowledgeBase:
     def __init__(self):
         self.facts = set()  # known true propositions
         self.rules = []     # list of Rule objects
+        self.clause_cache = None  # resolution clauses, rebuilt after any change
+        self.model_cache = None   # (symbols, valid-model mask) from the last truth table
 
     def add_fact(self, fact):
         self.facts.add(fact)
+        self.invalidate_caches()
 
     def add_rule(self, rule):
         self.rules.append(rule)
+        self.invalidate_caches()
+
+    def invalidate_caches(self):
+        """Call after changing facts or rules directly"""
+        self.clause_cache = None
+        self.model_cache = None
 
 # General Propositional Logic Classes
 
 class LogicalExpression:
     """Base class for logical expressions"""
-    pass
+    # Every node class declares its fields, so trees carry no per-node dict.
+    # Nodes are never mutated, so each hashes once at construction from its
+    # children's cached hashes rather than re-walking the subtree.
+    __slots__ = ('_hash',)
 
 class Atom(LogicalExpression):
     """Atomic proposition (single symbol)"""
+    __slots__ = ('symbol',)
+    
     def __init__(self, symbol):
         self.symbol = symbol
+        self._hash = hash(symbol)
     
     def __str__(self):
         return self.symbol
@@ -41,12 +61,15 @@ class Atom(LogicalExpression):
         return isinstance(other, Atom) and self.symbol == other.symbol
     
     def __hash__(self):
-        return hash(self.symbol)
+        return self._hash
 
 class Negation(LogicalExpression):
     """Negation (~p)"""
+    __slots__ = ('operand',)
+    
     def __init__(self, operand):
         self.operand = operand
+        self._hash = hash(('~', operand))
     
     def __str__(self):
         return f"~{self.operand}"
@@ -55,14 +78,17 @@ class Negation(LogicalExpression):
         return isinstance(other, Negation) and self.operand == other.operand
     
     def __hash__(self):
-        return hash(('~', self.operand))
+        return self._hash
 
 class BinaryExpression(LogicalExpression):
     """Base for binary logical expressions"""
+    __slots__ = ('left', 'right', 'operator')
+    
     def __init__(self, left, right, operator):
         self.left = left
         self.right = right
         self.operator = operator
+        self._hash = hash((operator, left, right))
     
     def __str__(self):
         return f"({self.left} {self.operator} {self.right})"
@@ -73,25 +99,33 @@ class BinaryExpression(LogicalExpression):
                 self.right == other.right)
     
     def __hash__(self):
-        return hash((self.operator, self.left, self.right))
+        return self._hash
 
 class Conjunction(BinaryExpression):
     """AND operation (p & q)"""
+    __slots__ = ()
+    
     def __init__(self, left, right):
         super().__init__(left, right, "&")
 
 class Disjunction(BinaryExpression):
     """OR operation (p || q)"""
+    __slots__ = ()
+    
     def __init__(self, left, right):
         super().__init__(left, right, "||")
 
 class Implication(BinaryExpression):
     """Implication (p => q)"""
+    __slots__ = ()
+    
     def __init__(self, left, right):
         super().__init__(left, right, "=>")
 
 class Biconditional(BinaryExpression):
     """Biconditional (p <=> q)"""
+    __slots__ = ()
+    
     def __init__(self, left, right):
         super().__init__(left, right, "<=>")
 
@@ -99,9 +133,20 @@ class GeneralKnowledgeBase:
     """Extended knowledge base for general propositional logic"""
     def __init__(self):
         self.sentences = []  # List of LogicalExpression objects
+        self.clause_cache = {}  # id(sentence) -> (sentence, its resolution clauses)
+        self.fresh_atoms = count(1)  # numbers definitional atoms in those clauses
+        self.atom_cache = {}  # id(sentence) -> (sentence, frozenset of its atoms)
+        self.model_cache = None  # (atoms, valid-model mask) from the last truth table
     
     def add_sentence(self, sentence):
         self.sentences.append(sentence)
+        self.model_cache = None
+    
+    def invalidate_caches(self):
+        """Call after replacing or mutating sentences in place"""
+        self.clause_cache.clear()
+        self.atom_cache.clear()
+        self.model_cache = None
     
     def __str__(self):
         return "\n".join(str(sentence) for sentence in self.sentences)
@@ -110,20 +155,28 @@ class GeneralKnowledgeBase:
 
 class Clause:
     """Represents a clause (disjunction of literals) for resolution"""
+    __slots__ = ('literals', '_hash', '_str')
+    
     def __init__(self, literals):
-        # literals is a set of strings, where negative literals start with '~'
-        self.literals = set(literals) if literals else set()
+        # literals is a frozenset of strings, where negative literals start with '~'
+        self.literals = frozenset(literals) if literals else frozenset()
+        assert '' not in self.literals  # polarity tests on literal[0] rely on non-empty literals
+        self._hash = hash(self.literals)  # literals never change, so hash once
+        self._str = None  # built on first use, only traces print clauses
     
     def __str__(self):
-        if not self.literals:
-            return "□"  # Empty clause (contradiction)
-        return " || ".join(sorted(self.literals))
+        if self._str is None:
+            if not self.literals:
+                self._str = "□"  # Empty clause (contradiction)
+            else:
+                self._str = " || ".join(sorted(self.literals))
+        return self._str
     
     def __eq__(self, other):
         return isinstance(other, Clause) and self.literals == other.literals
     
     def __hash__(self):
-        return hash(frozenset(self.literals))
+        return self._hash
     
     def is_empty(self):
         return len(self.literals) == 0
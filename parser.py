@@ -1,36 +1,44 @@
 # parser.py - Enhanced to support both Horn clauses and general propositional logic
 
 import re
+import sys
 from knowledge_base import KnowledgeBase, Rule, LogicalExpression, Atom, Negation, Conjunction, Disjunction, Implication, Biconditional, GeneralKnowledgeBase
 
 def parse_file(filename):
     """Parse file - automatically detects Horn vs General logic"""
-    # First, check if it's a general logic file
-    if is_general_logic_file(filename):
-        return parse_general_file(filename)
+    # Read once; detection and parsing both work on the in-memory text
+    with open(filename, 'r') as file:
+        content = file.read()
+    if is_general_logic_content(content):
+        return parse_general_content(content)
     else:
-        return parse_horn_file(filename)
+        return parse_horn_content(content)
+
+def is_general_logic_content(content):
+    """Check if text contains general propositional logic operators"""
+    return any(op in content for op in ('||', '<=>', '~'))
 
 def is_general_logic_file(filename):
     """Check if file contains general propositional logic operators"""
     try:
         with open(filename, 'r') as file:
-            content = file.read()
-            # Look for general logic operators
-            return any(op in content for op in ['||', '<=>', '~'])
+            return is_general_logic_content(file.read())
     except:
         return False
 
 def parse_horn_file(filename):
     """Original Horn clause parser"""
     with open(filename, 'r') as file:
-        lines = file.readlines()
+        return parse_horn_content(file.read())
 
+def parse_horn_content(content):
+    """Parse Horn clause KB text"""
     kb = KnowledgeBase()
     query = None
     mode = None
+    tell_lines = []
 
-    for line in lines:
+    for line in content.splitlines():
         line = line.strip()
 
         if not line:
@@ -44,59 +52,78 @@ def parse_horn_file(filename):
             continue
 
         if mode == "TELL":
-            parse_horn_tell_line(line, kb)
+            tell_lines.append(line)
         elif mode == "ASK":
-            query = line.strip()
+            query = sys.intern(line)
 
+    add_horn_lines(tell_lines, kb)
     return kb, query
 
+def add_horn_lines(lines, kb):
+    """
+    Parse a batch of stripped Horn clause lines into kb, building the facts and
+    rules locally and handing them over in one step (caches reset once)
+    """
+    intern = sys.intern
+    facts = []
+    rules = []
+    for line in lines:
+        if '=>' in line:
+            premises_str, conclusion = line.split('=>')
+            rules.append(Rule([intern(p.strip()) for p in premises_str.split('&')],
+                              intern(conclusion.strip())))
+        else:
+            facts.append(intern(line))
+    kb.facts.update(facts)
+    kb.rules.extend(rules)
+    kb.invalidate_caches()
+
 def parse_horn_tell_line(line, kb):
     """Parse Horn clause line"""
-    if '=>' in line:
-        premises_str, conclusion = line.split('=>')
-        conclusion = conclusion.strip()
-        premises = [p.strip() for p in premises_str.split('&')]
-        rule = Rule(premises, conclusion)
-        kb.add_rule(rule)
-    else:
-        # It's a fact
-        fact = line.strip()
-        kb.add_fact(fact)
+    add_horn_lines([line.strip()], kb)
 
 # General Logic Parser Components
 
+# One alternation for all token types, compiled once; WS matches are skipped
+_TOKEN_RE = re.compile(
+    r'(?P<WS>\s+)'
+    r'|(?P<BICONDITIONAL><=>)'
+    r'|(?P<IMPLICATION>=>)'
+    r'|(?P<DISJUNCTION>\|\|)'
+    r'|(?P<CONJUNCTION>&)'
+    r'|(?P<NEGATION>~)'
+    r'|(?P<LPAREN>\()'
+    r'|(?P<RPAREN>\))'
+    r'|(?P<ATOM>[a-z][0-9]*)'  # Variables like p, p1, p2, etc.
+)
+
 def tokenize(expression):
     """Tokenize a logical expression"""
-    token_patterns = [
-        (r'\s+', None),  # Skip whitespace
-        (r'<=>', 'BICONDITIONAL'),
-        (r'=>', 'IMPLICATION'), 
-        (r'\|\|', 'DISJUNCTION'),
-        (r'&', 'CONJUNCTION'),
-        (r'~', 'NEGATION'),
-        (r'\(', 'LPAREN'),
-        (r'\)', 'RPAREN'),
-        (r'[a-z][0-9]*', 'ATOM'),  # Variables like p, p1, p2, etc.
-    ]
-    
     tokens = []
     i = 0
+    match = _TOKEN_RE.match
     while i < len(expression):
-        for pattern, token_type in token_patterns:
-            regex = re.compile(pattern)
-            match = regex.match(expression, i)
-            if match:
-                if token_type:  # Skip whitespace (None type)
-                    tokens.append((token_type, match.group()))
-                i = match.end()
-                break
-        else:
+        m = match(expression, i)
+        if m is None:
             raise ValueError(f"Invalid character at position {i}: {expression[i]}")
+        token_type = m.lastgroup
+        if token_type != 'WS':
+            tokens.append((token_type, m.group()))
+        i = m.end()
     
     return tokens
 
+# Binary operators from loosest to tightest binding
+BINARY_PRECEDENCE = {'BICONDITIONAL': 1, 'IMPLICATION': 2, 'DISJUNCTION': 3, 'CONJUNCTION': 4}
+BINARY_CONSTRUCTORS = {
+    'BICONDITIONAL': Biconditional,
+    'IMPLICATION': Implication,
+    'DISJUNCTION': Disjunction,
+    'CONJUNCTION': Conjunction,
+}
+
 class ExpressionParser:
-    """Recursive descent parser for logical expressions"""
+    """Precedence-climbing parser for logical expressions"""
     
     def __init__(self, tokens):
         self.tokens = tokens
@@ -118,92 +145,66 @@ class ExpressionParser:
     
     def parse(self):
         """Parse the entire expression"""
-        expr = self.parse_biconditional()
+        expr = self.parse_expr()
         if self.pos < len(self.tokens):
             raise ValueError(f"Unexpected token: {self.tokens[self.pos]}")
         return expr
     
-    def parse_biconditional(self):
-        """Parse biconditional expressions (lowest precedence)"""
-        left = self.parse_implication()
-        
-        while self.peek() and self.peek()[0] == 'BICONDITIONAL':
-            self.consume('BICONDITIONAL')
-            right = self.parse_implication()
-            left = Biconditional(left, right)
-        
-        return left
-    
-    def parse_implication(self):
-        """Parse implication expressions"""
-        left = self.parse_disjunction()
-        
-        while self.peek() and self.peek()[0] == 'IMPLICATION':
-            self.consume('IMPLICATION')
-            right = self.parse_disjunction()
-            left = Implication(left, right)
-        
-        return left
-    
-    def parse_disjunction(self):
-        """Parse disjunction (OR) expressions"""
-        left = self.parse_conjunction()
-        
-        while self.peek() and self.peek()[0] == 'DISJUNCTION':
-            self.consume('DISJUNCTION')
-            right = self.parse_conjunction()
-            left = Disjunction(left, right)
-        
-        return left
-    
-    def parse_conjunction(self):
-        """Parse conjunction (AND) expressions"""
-        left = self.parse_negation()
-        
-        while self.peek() and self.peek()[0] == 'CONJUNCTION':
-            self.consume('CONJUNCTION')
-            right = self.parse_negation()
-            left = Conjunction(left, right)
-        
-        return left
-    
-    def parse_negation(self):
-        """Parse negation expressions"""
-        if self.peek() and self.peek()[0] == 'NEGATION':
-            self.consume('NEGATION')
-            operand = self.parse_negation()  # Allow multiple negations
-            return Negation(operand)
+    def parse_expr(self, min_prec=0):
+        """
+        Precedence climbing: parse a prefix operand, then fold in binary operators
+        binding at least as tightly as min_prec. All binary operators are
+        left-associative, so the right operand only takes tighter operators.
+        """
+        left = self.parse_unary()
         
-        return self.parse_primary()
+        while True:
+            token = self.peek()
+            prec = BINARY_PRECEDENCE.get(token[0]) if token else None
+            if prec is None or prec < min_prec:
+                return left
+            self.pos += 1
+            right = self.parse_expr(prec + 1)
+            left = BINARY_CONSTRUCTORS[token[0]](left, right)
     
-    def parse_primary(self):
-        """Parse primary expressions (atoms and parenthesized expressions)"""
+    def parse_unary(self):
+        """Parse negations (binding tightest), atoms and parenthesized expressions"""
+        negations = 0
         token = self.peek()
+        while token and token[0] == 'NEGATION':  # Allow multiple negations
+            negations += 1
+            self.pos += 1
+            token = self.peek()
         
         if not token:
             raise ValueError("Unexpected end of expression")
         
         if token[0] == 'ATOM':
-            self.consume('ATOM')
-            return Atom(token[1])
+            self.pos += 1
+            expr = Atom(sys.intern(token[1]))
         elif token[0] == 'LPAREN':
-            self.consume('LPAREN')
-            expr = self.parse_biconditional()
+            self.pos += 1
+            expr = self.parse_expr()
             self.consume('RPAREN')
-            return expr
         else:
             raise ValueError(f"Unexpected token: {token}")
+        
+        for _ in range(negations):
+            expr = Negation(expr)
+        return expr
 
 def parse_general_file(filename):
     """Parse a file with general propositional logic"""
     with open(filename, 'r') as file:
-        lines = file.readlines()
-    
+        return parse_general_content(file.read())
+
+def parse_general_content(content):
+    """Parse general propositional logic KB text"""
     kb = GeneralKnowledgeBase()
     query = None
     mode = None
     
-    for line in lines:
+    for line in content.splitlines():
         line = line.strip()
         
         if not line:
@@ -224,20 +225,51 @@ def parse_general_file(filename):
             kb.add_sentence(sentence)
         elif mode == "ASK":
             # Query should be a simple atom for now
-            query = line.strip()
+            query = sys.intern(line)
     
     return kb, query
 
-def extract_atoms(expr):
-    """Extract all atomic propositions from a logical expression"""
-    atoms = set()
+def extract_atoms(expr, cache=None):
+    """
+    Extract all atomic propositions from a logical expression
+    cache: optional dict id(expr) -> (expr, frozenset of its atoms), such as a KB's
+    atom_cache; results are stored there and cached subexpressions are not walked again
+    """
+    if cache is not None:
+        cached = cache.get(id(expr))
+        if cached is not None and cached[0] is expr:
+            return cached[1]
     
-    if isinstance(expr, Atom):
-        atoms.add(expr.symbol)
-    elif isinstance(expr, Negation):
-        atoms.update(extract_atoms(expr.operand))
-    elif hasattr(expr, 'left') and hasattr(expr, 'right'):  # Binary expressions
-        atoms.update(extract_atoms(expr.left))
-        atoms.update(extract_atoms(expr.right))
+    atoms = set()
+    stack = [expr]
+    while stack:
+        e = stack.pop()
+        if isinstance(e, Atom):
+            atoms.add(e.symbol)
+            continue
+        cached = cache.get(id(e)) if cache is not None and e is not expr else None
+        if cached is not None and cached[0] is e:  # Shared subexpression seen before
+            atoms.update(cached[1])
+        elif isinstance(e, Negation):
+            stack.append(e.operand)
+        elif hasattr(e, 'left') and hasattr(e, 'right'):  # Binary expressions
+            stack.append(e.left)
+            stack.append(e.right)
     
-    return atoms
\ No newline at end of file
+    atoms = frozenset(atoms)
+    if cache is not None:
+        cache[id(expr)] = (expr, atoms)
+    return atoms
+
+def atoms_of_kb(kb):
+    """All atoms mentioned by a KnowledgeBase or GeneralKnowledgeBase"""
+    if isinstance(kb, GeneralKnowledgeBase):
+        atoms = set()
+        for sentence in kb.sentences:
+            atoms.update(extract_atoms(sentence, kb.atom_cache))
+        return atoms
+    atoms = set(kb.facts)
+    for rule in kb.rules:
+        atoms.update(rule.premises)
+        atoms.add(rule.conclusion)
+    return atoms
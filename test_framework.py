@@ -3,17 +3,120 @@
 import time
 import subprocess
 import os
-import glob
+import sys
+import io
+import contextlib
+import importlib.util
+import inspect
+import signal
+import threading
+import asyncio
+import multiprocessing
+import functools
+import re
+import tempfile
+import json
+import queue
+import struct
 from typing import Dict, List, Tuple, Any
 
+ENGINE_TIMEOUT = 30  # seconds allowed per (test, method) run
+
+class EngineTimeout(BaseException):
+    """Raised inside an in-process engine run that overruns ENGINE_TIMEOUT
+    (a BaseException so the engine's own `except Exception` cannot swallow it)"""
+
+@contextlib.contextmanager
+def time_limit(seconds):
+    """Interrupt the enclosed block after `seconds` via SIGALRM, where available"""
+    if not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    
+    def expire(signum, frame):
+        raise EngineTimeout()
+    
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+# Worker messages use orjson when it is installed, else the standard json module
+try:
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:
+    def json_dumps(obj):
+        return json.dumps(obj).encode()
+    json_loads = json.loads
+
+FRAME_HEADER = struct.Struct("<I")  # byte length prefixed to every message, as in `engine --serve`
+
+class EngineWorker:
+    """One long-running `engine --serve` process, answering one job at a time"""
+    
+    def __init__(self, command: List[str]):
+        self.proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL)
+    
+    def request(self, job: Dict[str, Any]) -> str:
+        """Send one job and return the engine's printed output (EOFError if it died)"""
+        payload = json_dumps(job)
+        self.proc.stdin.write(FRAME_HEADER.pack(len(payload)) + payload)
+        self.proc.stdin.flush()
+        header = self.proc.stdout.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            raise EOFError("engine worker exited")
+        (length,) = FRAME_HEADER.unpack(header)
+        message = self.proc.stdout.read(length)
+        if len(message) < length:
+            raise EOFError("engine worker exited")
+        return json_loads(message)["output"]
+    
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+    
+    def close(self):
+        if self.alive():
+            self.proc.kill()
+        self.proc.wait()
+
 class TestFramework:
     """Automated testing framework for the inference engine"""
     
-    def __init__(self, engine_path="iengine.py", test_folder="tests"):
+    # Standard inference methods
+    METHODS = ['TT', 'FC', 'BC', 'RES']
+    # Output prefixes marking a failed run (str.startswith takes the tuple directly)
+    ERROR_PREFIXES = ("ERROR", "TIMEOUT", "Exception", "Process error", "Invalid output")
+    # Test-name keywords flagging complex logic; the debug hint leaves out 'deep'
+    _COMPLEX_RE = re.compile(r"demorgan|biconditional|complex|deep|negation")
+    _DEBUG_HINT_RE = re.compile(r"demorgan|biconditional|complex|negation")
+    
+    def __init__(self, engine_path="iengine.py", test_folder="tests", isolated=False,
+                 jobs=None, shards=1, shard_index=0, workers=False):
         self.engine_path = engine_path
         self.test_folder = test_folder
         self.test_results = []
         self.debug_mode = False
+        # By default the engine is imported once and called in-process; isolated
+        # runs start a fresh interpreter for every (test, method) pair instead
+        self.isolated = isolated
+        # Same interpreter as the framework, found without a PATH search
+        self._python = sys.executable or "python3"
+        # With workers, jobs go to `jobs` persistent `engine --serve` processes,
+        # giving process isolation without an interpreter start per run
+        self.use_workers = workers
+        self._idle_workers = None  # queue of EngineWorkers, started on first use
+        self._engine = None  # engine module once loaded, False if it can't be used in-process
+        self._engine_shares_kb = False
+        self.jobs = jobs or os.cpu_count() or 1  # worker processes for run_all_tests
+        # run_all_tests only runs every shards-th discovered file, starting at shard_index,
+        # so separate machines can split the suite between them
+        self.shards = shards
+        self.shard_index = shard_index
+        self._temp_dir = None  # holds the generated performance KBs for the framework's lifetime
     
     def set_debug_mode(self, debug=True):
         """Enable/disable debug mode for detailed output"""
@@ -21,58 +124,241 @@ class TestFramework:
     
     def discover_test_files(self) -> List[str]:
         """Discover all test files in the test folder"""
-        if not os.path.exists(self.test_folder):
+        # One directory scan; DirEntry caches file types, so no per-file stat
+        # (hidden files are skipped, as the old "*.txt" glob did)
+        try:
+            with os.scandir(self.test_folder) as entries:
+                test_files = [entry.path for entry in entries
+                              if entry.name.endswith(".txt") and not entry.name.startswith(".")
+                              and entry.is_file()]
+        except FileNotFoundError:
             print(f"Warning: Test folder '{self.test_folder}' does not exist")
             return []
-        
-        # Look for .txt files in the test folder
-        pattern = os.path.join(self.test_folder, "*.txt")
-        test_files = glob.glob(pattern)
+        except NotADirectoryError:
+            test_files = []
         
         if not test_files:
             print(f"Warning: No .txt test files found in '{self.test_folder}'")
         
         return sorted(test_files)
     
-    def run_inference_engine(self, test_file: str, method: str) -> Tuple[bool, str]:
-        """Run the inference engine and return (success, output)"""
-        try:
-            cmd = ["python3", self.engine_path, test_file, method]
-            if self.debug_mode:
-                print(f"    Running command: {' '.join(cmd)}")
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode == 0:
-                output = result.stdout.strip()
+    def load_engine(self):
+        """Import the engine module once; None if it has no run() entry point"""
+        if self._engine is None:
+            try:
+                # The engine imports its sibling modules (parser, knowledge_base, ...)
+                engine_dir = os.path.dirname(os.path.abspath(self.engine_path))
+                if engine_dir not in sys.path:
+                    sys.path.insert(0, engine_dir)
+                name = os.path.splitext(os.path.basename(self.engine_path))[0]
+                spec = importlib.util.spec_from_file_location(name, self.engine_path)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                self._engine = module if hasattr(module, 'run') else False
+                # Engines whose run() takes a `parsed` cache can share one parse per file
+                self._engine_shares_kb = bool(self._engine) and \
+                    'parsed' in inspect.signature(module.run).parameters
+            except Exception as e:
                 if self.debug_mode:
-                    print(f"    Raw output: '{output}'")
-                
-                # Check if output contains valid result (YES or NO at start)
-                if output and (output.startswith("YES") or output.startswith("NO")):
-                    return True, output
+                    print(f"    Could not import {self.engine_path} ({e}), using subprocesses")
+                self._engine = False
+        return self._engine or None
+    
+    def uses_subprocesses(self) -> bool:
+        """True when each run needs its own interpreter (isolated, or no in-process engine)"""
+        return self.isolated or self.use_workers or self.load_engine() is None
+    
+    def run_inference_engine(self, test_file: str, method: str, parsed: Dict = None) -> Tuple[bool, str]:
+        """
+        Run the inference engine and return (success, output)
+        parsed: per-file dict shared by calls for the same test, so an in-process
+        engine parses the file once for all methods
+        """
+        if self.use_workers:
+            return self.run_engine_worker(test_file, method)
+        engine = None if self.isolated else self.load_engine()
+        if engine is not None:
+            return self.run_engine_in_process(engine, test_file, method, parsed)
+        return self.run_engine_subprocess(test_file, method)
+    
+    def engine_command(self, test_file: str, method: str) -> List[str]:
+        """Command line that runs the engine on one (test, method) pair"""
+        # -S skips site.py: the engine only needs the standard library
+        cmd = [self._python, "-S", self.engine_path, test_file, method]
+        if self.debug_mode:
+            print(f"    Running command: {' '.join(cmd)}")
+        return cmd
+    
+    def check_process_result(self, returncode: int, stdout: str, stderr: str) -> Tuple[bool, str]:
+        """Turn a finished engine process into (success, output)"""
+        if returncode == 0:
+            return self.check_output(stdout.strip())
+        error_msg = stderr.strip() if stderr.strip() else stdout.strip()
+        if self.debug_mode:
+            print(f"    Error output: '{error_msg}'")
+        return False, f"Process error: {error_msg[:100]}..."
+    
+    def check_output(self, output: str) -> Tuple[bool, str]:
+        """Validate the engine's stripped stdout, returning (success, output)"""
+        if self.debug_mode:
+            print(f"    Raw output: '{output}'")
+        
+        # Check if output contains valid result (YES or NO at start)
+        if output and output.startswith(("YES", "NO")):
+            return True, output
+        else:
+            return False, f"Invalid output format: {output[:100]}..."
+    
+    def run_engine_in_process(self, engine, test_file: str, method: str, parsed: Dict = None) -> Tuple[bool, str]:
+        """Call the imported engine's run() directly, capturing what it prints"""
+        if self.debug_mode:
+            print(f"    Running in-process: {self.engine_path} {test_file} {method}")
+        
+        buffer = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(buffer), time_limit(ENGINE_TIMEOUT):
+                if parsed is not None and self._engine_shares_kb:
+                    engine.run(test_file, method, parsed=parsed)
                 else:
-                    return False, f"Invalid output format: {output[:100]}..."
-            else:
-                error_msg = result.stderr.strip() if result.stderr.strip() else result.stdout.strip()
-                if self.debug_mode:
-                    print(f"    Error output: '{error_msg}'")
-                return False, f"Process error: {error_msg[:100]}..."
-                
-        except subprocess.TimeoutExpired:
-            return False, "TIMEOUT: Process exceeded 30 seconds"
+                    engine.run(test_file, method)
+        except EngineTimeout:
+            return False, f"TIMEOUT: Process exceeded {ENGINE_TIMEOUT} seconds"
+        except (Exception, SystemExit) as e:
+            return False, f"Exception: {str(e)}"
+        
+        return self.check_output(buffer.getvalue().strip())
+    
+    def run_engine_subprocess(self, test_file: str, method: str) -> Tuple[bool, str]:
+        """Run the engine in a fresh interpreter and return (success, output)"""
+        success, output, _ = asyncio.run(self.run_engine_subprocess_async(test_file, method))
+        return success, output
+    
+    async def run_engine_subprocess_async(self, test_file: str, method: str) -> Tuple[bool, str, float]:
+        """
+        Asynchronous run_engine_subprocess, returning (success, output, elapsed seconds)
+        stdout is read line by line and the process is stopped as soon as a YES/NO
+        line arrives, since nothing printed after the answer is used.
+        """
+        start_time = time.time()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *self.engine_command(test_file, method),
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
         except FileNotFoundError:
-            return False, f"ERROR: Could not find {self.engine_path}"
+            return False, f"ERROR: Could not find {self.engine_path}", time.time() - start_time
         except Exception as e:
-            return False, f"Exception: {str(e)}"
+            return False, f"Exception: {str(e)}", time.time() - start_time
+        
+        # Drain stderr alongside, so a chatty child can never block on a full pipe
+        stderr_task = asyncio.ensure_future(proc.stderr.read())
+        lines = []
+        
+        async def read_until_answer():
+            while True:
+                line = await proc.stdout.readline()
+                if not line:
+                    return False
+                lines.append(line.decode())
+                if line.startswith((b"YES", b"NO")):
+                    return True
+        
+        try:
+            answered = await asyncio.wait_for(read_until_answer(), ENGINE_TIMEOUT)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            stderr_task.cancel()
+            return False, f"TIMEOUT: Process exceeded {ENGINE_TIMEOUT} seconds", time.time() - start_time
+        
+        stdout = ''.join(lines)
+        if answered:
+            if proc.returncode is None:
+                # os.kill rather than proc.terminate(): Popen.send_signal() polls, and
+                # can reap the child before asyncio's watcher does (which then warns)
+                try:
+                    os.kill(proc.pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+            await proc.wait()
+            stderr_task.cancel()
+            success, output = self.check_output(stdout.strip())
+        else:
+            await proc.wait()
+            stderr = await stderr_task
+            success, output = self.check_process_result(proc.returncode, stdout, stderr.decode())
+        return success, output, time.time() - start_time
+    
+    def start_worker(self) -> EngineWorker:
+        return EngineWorker([self._python, "-S", self.engine_path, "--serve"])
+    
+    def run_engine_worker(self, test_file: str, method: str) -> Tuple[bool, str]:
+        """Run one job on an idle persistent worker (thread-safe); (success, output)"""
+        if self._idle_workers is None:
+            self._idle_workers = queue.Queue()
+            for _ in range(self.jobs):
+                self._idle_workers.put(self.start_worker())
+        
+        if self.debug_mode:
+            print(f"    Dispatching to worker: {test_file} {method}")
+        worker = self._idle_workers.get()
+        # A job that overruns gets its worker killed, which ends the pending read
+        expired = threading.Event()
+        
+        def expire():
+            expired.set()
+            worker.close()
+        
+        timer = threading.Timer(ENGINE_TIMEOUT, expire)
+        timer.start()
+        try:
+            return self.check_output(worker.request({"file": test_file, "method": method}).strip())
+        except (EOFError, OSError, ValueError) as e:
+            # Killed, crashed, or out of step with us: never reuse this worker
+            worker.close()
+            if expired.is_set():
+                return False, f"TIMEOUT: Process exceeded {ENGINE_TIMEOUT} seconds"
+            return False, f"Process error: {str(e)[:100]}..."
+        finally:
+            timer.cancel()
+            if not worker.alive():
+                worker = self.start_worker()
+            self._idle_workers.put(worker)
     
-    def extract_result(self, output: str) -> str:
-        """Extract YES/NO result from output"""
+    async def run_engine_worker_async(self, test_file: str, method: str) -> Tuple[bool, str, float]:
+        """run_engine_worker on a thread, returning (success, output, elapsed seconds)"""
+        start_time = time.time()
+        success, output = await asyncio.to_thread(self.run_engine_worker, test_file, method)
+        return success, output, time.time() - start_time
+    
+    def close_workers(self):
+        """Stop any persistent engine workers"""
+        if self._idle_workers is not None:
+            while not self._idle_workers.empty():
+                self._idle_workers.get().close()
+            self._idle_workers = None
+    
+    async def run_methods_async(self, test_file: str, limit: asyncio.Semaphore = None) -> List[Tuple[bool, str, float]]:
+        """Run every method on test_file concurrently, results in METHODS order"""
+        if limit is None:
+            limit = asyncio.Semaphore(os.cpu_count() or 1)
+        runner = self.run_engine_worker_async if self.use_workers else self.run_engine_subprocess_async
+        async with limit:
+            return await asyncio.gather(*[runner(test_file, method) for method in self.METHODS])
+    
+    async def run_files_async(self, test_files: List[str]) -> List[List[Tuple[bool, str, float]]]:
+        """Run all methods on all files, at most os.cpu_count() files at a time"""
+        limit = asyncio.Semaphore(os.cpu_count() or 1)
+        return await asyncio.gather(*[self.run_methods_async(test_file, limit) for test_file in test_files])
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def extract_result(output: str) -> str:
+        """Extract YES/NO result from output (memoized: reporting asks about each output many times)"""
         if not output:
             return "ERROR"
         
         # Handle error cases
-        if any(output.startswith(prefix) for prefix in ["ERROR", "TIMEOUT", "Exception", "Process error", "Invalid output"]):
+        if output.startswith(TestFramework.ERROR_PREFIXES):
             return "ERROR"
         
         # Extract result
@@ -85,49 +371,53 @@ class TestFramework:
     
     def validate_consistency(self, results: Dict[str, str], test_name: str) -> Tuple[bool, str]:
         """Check if all successful methods give consistent YES/NO results"""
-        # Extract YES/NO results from successful runs
-        outcomes = {}
+        # Group the methods of successful runs by their YES/NO answer, in run order
+        buckets = {}
         for method, output in results.items():
             result = self.extract_result(output)
-            if result in ["YES", "NO"]:
-                outcomes[method] = result
+            if result in ("YES", "NO"):
+                buckets.setdefault(result, []).append(method)
         
-        if len(outcomes) == 0:
+        if not buckets:
             return False, "No successful methods"
-        elif len(set(outcomes.values())) == 1:
-            consensus = list(outcomes.values())[0]
+        elif len(buckets) == 1:
+            consensus = next(iter(buckets))
             return True, f"Consistent: {consensus}"
         else:
             # Find disagreements
-            disagreements = []
-            unique_results = set(outcomes.values())
-            for result in unique_results:
-                methods_with_result = [m for m, r in outcomes.items() if r == result]
-                disagreements.append(f"{result}: {', '.join(methods_with_result)}")
-            
+            disagreements = [f"{result}: {', '.join(methods)}" for result, methods in buckets.items()]
             return False, f"Inconsistent: {' vs '.join(disagreements)}"
     
-    def run_single_test(self, test_file: str, test_name: str = None) -> Dict[str, Any]:
-        """Run a single test file with all applicable methods"""
+    def run_single_test(self, test_file: str, test_name: str = None, runs=None) -> Dict[str, Any]:
+        """
+        Run a single test file with all applicable methods
+        runs: (success, output, elapsed) per method, if already collected by run_all_tests
+        """
         if test_name is None:
             test_name = os.path.basename(test_file)
         
         print(f"\nRunning {test_name} ({test_file})...")
         
-        # Standard inference methods
-        methods = ['TT', 'FC', 'BC', 'RES']
+        # Separate interpreters are independent, so start all methods at once
+        if runs is None and self.uses_subprocesses():
+            runs = asyncio.run(self.run_methods_async(test_file))
+        
         results = {}
         timings = {}
+        parsed = {}  # the in-process engine parses test_file once for all methods
         
-        for method in methods:
+        for index, method in enumerate(self.METHODS):
             print(f"  Running {method}...", end=" ")
             
-            start_time = time.time()
-            success, output = self.run_inference_engine(test_file, method)
-            end_time = time.time()
+            if runs is not None:
+                success, output, elapsed = runs[index]
+            else:
+                start_time = time.time()
+                success, output = self.run_inference_engine(test_file, method, parsed)
+                elapsed = time.time() - start_time
             
             results[method] = output
-            timings[method] = end_time - start_time
+            timings[method] = elapsed
             
             # Show individual results
             if success:
@@ -137,6 +427,9 @@ class TestFramework:
                 error_msg = output[:50] + ('...' if len(output) > 50 else '')
                 print(f"✗ {error_msg} ({timings[method]:.3f}s)")
         
+        # Classify each output once; reporting reads these instead of re-scanning outputs
+        extracted = {method: self.extract_result(output) for method, output in results.items()}
+        
         # Validate consistency
         consistent, consistency_msg = self.validate_consistency(results, test_name)
         print(f"  ✓ {test_name}: {consistency_msg}")
@@ -144,19 +437,19 @@ class TestFramework:
         # Special handling for inconsistent results - show details
         if not consistent and "Inconsistent" in consistency_msg:
             print(f"    ⚠️  INCONSISTENCY DETECTED:")
-            for method, output in results.items():
-                result = self.extract_result(output)
+            for method, result in extracted.items():
                 if result in ["YES", "NO"]:
                     print(f"      {method}: {result}")
             
             # If this is a problematic test, suggest debugging
-            if any(name in test_name.lower() for name in ['demorgan', 'biconditional', 'complex', 'negation']):
+            if self._DEBUG_HINT_RE.search(test_name.lower()):
                 print(f"    💡 This test involves complex logic - consider running debug mode")
         
         test_result = {
             'name': test_name,
             'file': test_file,
             'results': results,
+            'extracted': extracted,
             'timings': timings,
             'consistent': consistent,
             'consistency_msg': consistency_msg
@@ -175,25 +468,47 @@ class TestFramework:
         
         print(f"=== Running All Tests from '{self.test_folder}' ===")
         print(f"Found {len(test_files)} test files")
+        if self.shards > 1:
+            test_files = test_files[self.shard_index::self.shards]
+            print(f"Running shard {self.shard_index + 1}/{self.shards}: {len(test_files)} files")
+        
+        # Spread the files over worker processes, each running its own shard of
+        # the suite; their output is replayed here in file order
+        jobs = min(self.jobs, len(test_files))
+        if jobs > 1 and not self.use_workers:
+            worker_args = (self.engine_path, self.test_folder, self.isolated, self.debug_mode)
+            with multiprocessing.Pool(jobs, _init_worker, worker_args) as pool:
+                for printed, test_result in pool.imap(_run_one, test_files, chunksize=4):
+                    sys.stdout.write(printed)
+                    self.test_results.append(test_result)
+            return
+        
+        # With subprocesses, every file's runs can proceed concurrently; results
+        # are then reported file by file in the usual order
+        all_runs = [None] * len(test_files)
+        if self.uses_subprocesses():
+            all_runs = asyncio.run(self.run_files_async(test_files))
         
-        for test_file in test_files:
+        for test_file, runs in zip(test_files, all_runs):
             # Create a nice test name from filename
             test_name = os.path.splitext(os.path.basename(test_file))[0]
-            self.run_single_test(test_file, test_name)
+            self.run_single_test(test_file, test_name, runs)
 
-    def generate_chain_kb(self, length: int) -> str:
-        """Generate a knowledge base with a chain of implications for performance testing"""
-        kb_content = "TELL\n"
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def generate_chain_kb(length: int) -> str:
+        """Generate a knowledge base with a chain of implications for performance testing
+        (deterministic in length, so each size is only built once)"""
+        parts = ["TELL"]
         
         # Create chain: p1 => p2 => p3 => ... => p{length}
-        for i in range(1, length):
-            kb_content += f"p{i} => p{i+1}\n"
+        parts.extend(f"p{i} => p{i+1}" for i in range(1, length))
         
         # Add initial fact
-        kb_content += "p1\n"
-        kb_content += f"\nASK\np{length}\n"
+        parts.append("p1")
+        parts.extend(["", "ASK", f"p{length}"])
         
-        return kb_content
+        return "\n".join(parts) + "\n"
     
     def run_performance_tests(self):
         """Run performance benchmarking tests"""
@@ -201,20 +516,20 @@ class TestFramework:
         test_sizes = [5, 10, 25, 50]
         
         for size in test_sizes:
-            # Generate test file
-            kb_content = self.generate_chain_kb(size)
-            temp_file = f"temp_chain_{size}.txt"
-            
-            try:
-                with open(temp_file, 'w') as f:
-                    f.write(kb_content)
-                
-                self.run_single_test(temp_file, f"Performance_Chain_Length_{size}")
-                
-            finally:
-                # Clean up temp file
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
+            self.run_single_test(self.chain_kb_file(size), f"Performance_Chain_Length_{size}")
+    
+    def chain_kb_file(self, length: int) -> str:
+        """Path of the generated chain KB of this length, written on first use"""
+        if self._temp_dir is None:
+            # Removed automatically when the framework is garbage collected or at exit;
+            # on Linux the files live in tmpfs so engine runs read them from memory
+            shm = "/dev/shm" if sys.platform.startswith("linux") and os.path.isdir("/dev/shm") else None
+            self._temp_dir = tempfile.TemporaryDirectory(prefix="iengine_perf_", dir=shm)
+        temp_file = os.path.join(self._temp_dir.name, f"temp_chain_{length}.txt")
+        if not os.path.exists(temp_file):
+            with open(temp_file, 'w') as f:
+                f.write(self.generate_chain_kb(length))
+        return temp_file
     
     def identify_problematic_tests(self) -> Dict[str, List[str]]:
         """Identify and categorize problematic tests"""
@@ -224,6 +539,7 @@ class TestFramework:
             'tt_specific': [],
             'complex_logic': []
         }
+        complex_search = self._COMPLEX_RE.search
         
         for result in self.test_results:
             name = result['name']
@@ -233,9 +549,10 @@ class TestFramework:
                 problems['inconsistent'].append(name)
                 
                 # Check if TT is the problem
-                tt_result = self.extract_result(result['results'].get('TT', ''))
-                other_results = [self.extract_result(result['results'].get(m, '')) 
-                               for m in ['FC', 'BC', 'RES'] if self.extract_result(result['results'].get(m, '')) in ['YES', 'NO']]
+                extracted = result['extracted']
+                tt_result = extracted.get('TT', 'ERROR')
+                other_results = [extracted.get(m, 'ERROR')
+                               for m in ['FC', 'BC', 'RES'] if extracted.get(m, 'ERROR') in ['YES', 'NO']]
                 
                 if tt_result in ['YES', 'NO'] and other_results and all(r != tt_result for r in other_results):
                     problems['tt_specific'].append(name)
@@ -245,49 +562,64 @@ class TestFramework:
                 problems['all_failed'].append(name)
             
             # Check for complex logic tests
-            if any(keyword in name.lower() for keyword in ['demorgan', 'biconditional', 'complex', 'deep', 'negation']):
+            if complex_search(name.lower()):
                 problems['complex_logic'].append(name)
         
         return problems
     
     def generate_report(self):
         """Generate a comprehensive test report"""
-        print("\n" + "="*70)
-        print("INFERENCE ENGINE TEST REPORT")
-        print("="*70)
-        
-        if not self.test_results:
-            print("No test results to report!")
+        # Collected into one list and written once instead of a print per line
+        lines = []
+        emit = lines.append
+        emit("\n" + "="*70)
+        emit("INFERENCE ENGINE TEST REPORT")
+        emit("="*70)
+        
+        test_results = self.test_results
+        if not test_results:
+            emit("No test results to report!")
+            sys.stdout.write("\n".join(lines) + "\n")
             return
         
-        total_tests = len(self.test_results)
-        consistent_tests = sum(1 for r in self.test_results if r['consistent'])
+        total_tests = len(test_results)
+        consistent_tests = sum(1 for r in test_results if r['consistent'])
         
-        print(f"Total Tests Run: {total_tests}")
-        print(f"Consistent Results: {consistent_tests}/{total_tests} ({(consistent_tests/total_tests)*100:.1f}%)")
+        emit(f"Total Tests Run: {total_tests}")
+        emit(f"Consistent Results: {consistent_tests}/{total_tests} ({(consistent_tests/total_tests)*100:.1f}%)")
         
         # Method performance summary
-        print("\n--- Method Performance Summary ---")
-        methods = ['TT', 'FC', 'BC', 'RES']
+        emit("\n--- Method Performance Summary ---")
+        methods = self.METHODS
+        
+        # One pass over the results fills every method's counters
+        # Per-result fields and per-method counters are bound to locals for the inner loop
+        agg = {m: {'succ': 0, 'err': 0, 'to': 0, 't': 0.0} for m in methods}
+        counters = [(m, agg[m]) for m in methods]
+        for result in test_results:
+            timings = result['timings']
+            extracted = result['extracted']
+            outputs = result['results']
+            for method, counts in counters:
+                elapsed = timings.get(method)
+                if elapsed is None:
+                    continue
+                counts['t'] += elapsed
+                method_result = extracted[method]
+                if method_result == "YES" or method_result == "NO":
+                    counts['succ'] += 1
+                elif method_result == "ERROR":
+                    if "TIMEOUT" in outputs[method]:
+                        counts['to'] += 1
+                    else:
+                        counts['err'] += 1
         
         for method in methods:
-            successful_runs = 0
-            total_time = 0
-            error_count = 0
-            timeout_count = 0
-            
-            for result in self.test_results:
-                if method in result['timings']:
-                    total_time += result['timings'][method]
-                    method_result = self.extract_result(result['results'][method])
-                    
-                    if method_result in ["YES", "NO"]:
-                        successful_runs += 1
-                    elif method_result == "ERROR":
-                        if "TIMEOUT" in result['results'][method]:
-                            timeout_count += 1
-                        else:
-                            error_count += 1
+            counts = agg[method]
+            successful_runs = counts['succ']
+            total_time = counts['t']
+            error_count = counts['err']
+            timeout_count = counts['to']
             
             avg_time = total_time / total_tests if total_tests > 0 else 0
             success_rate = (successful_runs / total_tests) * 100 if total_tests > 0 else 0
@@ -299,37 +631,39 @@ class TestFramework:
                 status_info.append(f"{error_count} errors")
             
             status_str = f" ({', '.join(status_info)})" if status_info else ""
-            print(f"{method:10}: {success_rate:5.1f}% success, avg {avg_time:.3f}s per test{status_str}")
+            emit(f"{method:10}: {success_rate:5.1f}% success, avg {avg_time:.3f}s per test{status_str}")
         
         # Analyze problematic tests
         problems = self.identify_problematic_tests()
+        by_name = {r['name']: r for r in test_results}
         
         if problems['inconsistent']:
-            print(f"\n--- Inconsistent Tests ({len(problems['inconsistent'])}) ---")
+            emit(f"\n--- Inconsistent Tests ({len(problems['inconsistent'])}) ---")
             for test_name in problems['inconsistent']:
-                test_result = next(r for r in self.test_results if r['name'] == test_name)
-                print(f"⚠️  {test_name}: {test_result['consistency_msg']}")
+                test_result = by_name[test_name]
+                emit(f"⚠️  {test_name}: {test_result['consistency_msg']}")
                 
                 # Show the actual disagreement
                 for method in ['TT', 'FC', 'BC', 'RES']:
                     if method in test_result['results']:
-                        result = self.extract_result(test_result['results'][method])
+                        result = test_result['extracted'][method]
                         if result in ['YES', 'NO']:
-                            print(f"     {method}: {result}")
+                            emit(f"     {method}: {result}")
         
         
         if problems['complex_logic']:
-            print(f"\n--- Complex Logic Tests ({len(problems['complex_logic'])}) ---")
-            print("These tests involve complex logical expressions:")
+            emit(f"\n--- Complex Logic Tests ({len(problems['complex_logic'])}) ---")
+            emit("These tests involve complex logical expressions:")
             for test_name in problems['complex_logic']:
-                status = "✓" if any(r['name'] == test_name and r['consistent'] for r in self.test_results) else "⚠️"
-                print(f"{status} {test_name}")
+                status = "✓" if by_name[test_name]['consistent'] else "⚠️"
+                emit(f"{status} {test_name}")
         
         if problems['all_failed']:
-            print(f"\n--- Completely Failed Tests ({len(problems['all_failed'])}) ---")
+            emit(f"\n--- Completely Failed Tests ({len(problems['all_failed'])}) ---")
             for test_name in problems['all_failed']:
-                print(f"❌ {test_name}: All methods failed")
-      
+                emit(f"❌ {test_name}: All methods failed")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
 
     def run_debug_session(self, test_name: str):
         """Run a specific test in debug mode with detailed output"""
@@ -393,35 +727,76 @@ class TestFramework:
         # Generate final report
         self.generate_report()
 
+_worker_framework = None  # per-process TestFramework used by pool workers
+
+def _init_worker(engine_path, test_folder, isolated, debug_mode):
+    """Pool initializer: one framework (and one engine import) per worker process"""
+    global _worker_framework
+    _worker_framework = TestFramework(engine_path, test_folder, isolated=isolated, jobs=1)
+    _worker_framework.debug_mode = debug_mode
+
+def _run_one(test_file):
+    """Pool task: run one test file, returning (its printed output, its test_result)"""
+    framework = _worker_framework
+    framework.test_results = []
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        test_name = os.path.splitext(os.path.basename(test_file))[0]
+        test_result = framework.run_single_test(test_file, test_name)
+    return buffer.getvalue(), test_result
+
 def main():
     """Main function to run the test framework"""
-    import sys
     
     # You can customize these paths
     engine_path = "iengine.py"  # Path to your inference engine
     test_folder = "tests"       # Folder containing test files
     
-    framework = TestFramework(engine_path, test_folder)
+    # Options: --isolated runs every method in its own interpreter instead of
+    # in-process; --workers sends runs to persistent `iengine.py --serve` processes;
+    # --jobs N sets the number of worker processes; --shards N with
+    # --shard-index K (0-based) runs only that slice of the discovered tests
+    options = {'--jobs': None, '--shards': 1, '--shard-index': 0}
+    isolated = False
+    workers = False
+    args = []
+    argv = iter(sys.argv[1:])
+    for arg in argv:
+        if arg == '--isolated':
+            isolated = True
+        elif arg == '--workers':
+            workers = True
+        elif arg in options:
+            options[arg] = int(next(argv, 0))
+        else:
+            args.append(arg)
+    
+    framework = TestFramework(engine_path, test_folder, isolated=isolated,
+                              jobs=options['--jobs'], shards=options['--shards'],
+                              shard_index=options['--shard-index'], workers=workers)
     
     # Handle command line arguments
-    if len(sys.argv) > 1:
-        command = sys.argv[1]
-        
-        if command == "debug":
-            if len(sys.argv) > 2:
-                test_name = sys.argv[2]
-                framework.run_debug_session(test_name)
+    try:
+        if args:
+            command = args[0]
+        
+            if command == "debug":
+                if len(args) > 1:
+                    test_name = args[1]
+                    framework.run_debug_session(test_name)
+                else:
+                    print("Usage: python3 test_framework.py [options] debug <test_name>")
+            elif command == "quick":
+                # Run without performance tests
+                framework.run_all_tests()
+                framework.generate_report()
             else:
-                print("Usage: python3 test_framework.py debug <test_name>")
-        elif command == "quick":
-            # Run without performance tests
-            framework.run_all_tests()
-            framework.generate_report()
+                print("Unknown command. Use 'debug <test_name>' or 'quick'")
         else:
-            print("Unknown command. Use 'debug <test_name>' or 'quick'")
-    else:
-        # Run full suite
-        framework.run_full_suite()
+            # Run full suite
+            framework.run_full_suite()
+    finally:
+        framework.close_workers()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file